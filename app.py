@@ -1,40 +1,223 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from deepface import DeepFace
-import cv2
-import numpy as np
+import multiprocessing
+import os
+import emotion_model
+from emotion_batcher import MicroBatcher
+from emotion_cache import EmotionResultCache
+from emotion_preprocess import StageTimer
+from concurrent.futures.process import BrokenProcessPool
+from emotion_workers import InferencePool, QueueFull, EMOTION_RETRY_AFTER
 
 app = Flask(__name__)
-CORS(app)  # Allow cross-origin requests from frontend
+CORS(app, expose_headers=["Server-Timing"])  # Allow cross-origin requests from frontend
+
+EMOTION_BATCHING = os.getenv("EMOTION_BATCHING", "true").lower() == "true"
+EMOTION_INFER_TIMEOUT = float(os.getenv("EMOTION_INFER_TIMEOUT", "30"))
+EMOTION_MAX_BATCH_IMAGES = int(os.getenv("EMOTION_MAX_BATCH_IMAGES", "16"))
+EMOTION_MAX_BURST_FRAMES = int(os.getenv("EMOTION_MAX_BURST_FRAMES", "10"))
+# "thread": the model runs inside this process; "pool": worker processes each hold a model
+EMOTION_SERVING_MODE = os.getenv("EMOTION_SERVING_MODE", "thread").lower()
+FLASK_DEBUG = os.getenv("FLASK_DEBUG", "false" if EMOTION_SERVING_MODE == "pool" else "true").lower() == "true"
+
+# ✅ Concurrent requests share emotion model runs through the micro-batcher
+batcher = MicroBatcher(emotion_model.predict_faces)
+inference_pool = InferencePool()
+# ✅ Repeated (or nearly identical) frames reuse the last result for a short while
+result_cache = EmotionResultCache()
+
+# ✅ Load and warm the emotion model at startup instead of on the first request
+# Spawned pool workers import this module too; only the parent process starts anything
+if multiprocessing.current_process().name == "MainProcess":
+    if EMOTION_SERVING_MODE == "pool":
+        inference_pool.start()
+    elif os.getenv("EMOTION_PRELOAD", "true").lower() == "true":
+        emotion_model.start_background_warmup()
+
+def classify_faces(faces):
+    if EMOTION_BATCHING:
+        futures = [batcher.submit(face) for face in faces]
+        return [future.result(timeout=EMOTION_INFER_TIMEOUT) for future in futures]
+    return emotion_model.predict_faces(faces)
+
+def run_inference(blobs, timer):
+    """
+    Decodes, detects and classifies raw image bytes, in this process or on a pool
+    worker. Returns one result per blob (None for undecodable bytes). Raises
+    QueueFull when every worker is busy and the wait queue is full.
+    """
+    if EMOTION_SERVING_MODE == "pool":
+        return run_in_pool(inference_pool.submit, blobs, timer)
+    return emotion_model.analyze_images(blobs, timer, classify_faces)
+
+def run_burst(blobs, timer):
+    """Like run_inference for a frame burst; returns emotion_model.analyze_burst's output."""
+    if EMOTION_SERVING_MODE == "pool":
+        return run_in_pool(inference_pool.submit_burst, blobs, timer)
+    return emotion_model.analyze_burst(blobs, timer, classify_faces)
+
+def run_in_pool(submit, blobs, timer):
+    with timer.stage("queue"):
+        output, stages = submit(blobs).result(timeout=EMOTION_INFER_TIMEOUT)
+    # Time spent waiting for a worker, net of the worker's own stages
+    timer.stages["queue"] -= sum(stages.values())
+    timer.stages.update(stages)
+    return output
+
+def model_ready():
+    if EMOTION_SERVING_MODE == "pool":
+        return inference_pool.is_ready()
+    return emotion_model.wait_until_ready()
+
+def timing_headers(timer):
+    return {"Server-Timing": timer.header(), "Timing-Allow-Origin": "*"}
+
+def overloaded():
+    # Also answers requests caught by a crashed pool worker while the pool restarts
+    return jsonify({"error": "Emotion service is busy, try again shortly"}), 503, {"Retry-After": EMOTION_RETRY_AFTER}
 
 @app.route("/", methods=["GET"])
 def home():
     return "Flask Server Running!"
 
+# ✅ Liveness: the process is up (the model may still be loading)
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    return jsonify({"status": "ok"})
+
+# ✅ Readiness: only route kiosk traffic here once the model is warm
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    if EMOTION_SERVING_MODE == "pool":
+        status = inference_pool.status()
+    else:
+        status = emotion_model.status()
+    return jsonify(status), (200 if status["ready"] else 503)
+
+@app.route("/batching_stats", methods=["GET"])
+def batching_stats():
+    return jsonify({"enabled": EMOTION_BATCHING, **batcher.stats()})
+
+@app.route("/emotion_cache_stats", methods=["GET"])
+def emotion_cache_stats():
+    return jsonify({"enabled": result_cache.enabled, **result_cache.stats()})
+
+@app.route("/pool_stats", methods=["GET"])
+def pool_stats():
+    return jsonify({"serving_mode": EMOTION_SERVING_MODE, **inference_pool.status()})
+
 @app.route("/detect_emotion", methods=["POST"])
 def detect_emotion():
     if "image" not in request.files:
         return jsonify({"error": "No image uploaded"}), 400
 
-    image_file = request.files["image"]
-    image_bytes = np.frombuffer(image_file.read(), np.uint8)
-    img = cv2.imdecode(image_bytes, cv2.IMREAD_COLOR)
+    if not model_ready():
+        return jsonify({"error": "Emotion model is still loading"}), 503, {"Retry-After": "5"}
 
-    if img is None:
-        return jsonify({"error": "Invalid image format"}), 400
+    timer = StageTimer()
+    data = request.files["image"].read()
+    with timer.stage("hash"):
+        key = result_cache.frame_key(data)
+        result = result_cache.get(key)
+
+    if result is None:
+        try:
+            # DeepFace works on BGR frames, so the decoded frame is used as-is
+            result = run_inference([data], timer)[0]
+        except (QueueFull, BrokenProcessPool):
+            return overloaded()
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+        if result is None:
+            return jsonify({"error": "Invalid image format"}), 400
+        result_cache.set(key, result)
+
+    dominant_emotion = result["dominant_emotion"]
+    return jsonify({"emotion": dominant_emotion}), 200, timing_headers(timer)
+
+# ✅ Several images in one multipart request (field name "images")
+@app.route("/detect_emotion_batch", methods=["POST"])
+def detect_emotion_batch():
+    image_files = request.files.getlist("images")
+    if not image_files:
+        return jsonify({"error": "No images uploaded"}), 400
+    if len(image_files) > EMOTION_MAX_BATCH_IMAGES:
+        return jsonify({"error": f"At most {EMOTION_MAX_BATCH_IMAGES} images per request"}), 400
+
+    if not model_ready():
+        return jsonify({"error": "Emotion model is still loading"}), 503, {"Retry-After": "5"}
 
-    try:
-        # Convert BGR to RGB for DeepFace
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    timer = StageTimer()
+    blobs = [image_file.read() for image_file in image_files]
+    with timer.stage("hash"):
+        keys = [result_cache.frame_key(data) for data in blobs]
+        analyses = [result_cache.get(key) for key in keys]
 
-        # Detect Emotion using DeepFace
-        result = DeepFace.analyze(img_rgb, actions=["emotion"], enforce_detection=False)
-        dominant_emotion = result[0]["dominant_emotion"]
+    # Only the images without a cached result go to the model
+    missing = [i for i, analysis in enumerate(analyses) if analysis is None]
+    if missing:
+        try:
+            fresh = run_inference([blobs[i] for i in missing], timer)
+        except (QueueFull, BrokenProcessPool):
+            return overloaded()
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+        for i, analysis in zip(missing, fresh):
+            analyses[i] = analysis
+            if analysis is not None:
+                result_cache.set(keys[i], analysis)
 
-        return jsonify({"emotion": dominant_emotion})
+    results = [
+        {"error": "Invalid image format"} if analysis is None
+        else {"emotion": analysis["dominant_emotion"], "scores": analysis["emotion"]}
+        for analysis in analyses
+    ]
+    return jsonify({"results": results}), 200, timing_headers(timer)
+
+# ✅ A short burst of frames in capture order (field name "frames"); scoring stops
+# early once the averaged emotion probabilities are confident enough
+@app.route("/detect_emotion_burst", methods=["POST"])
+def detect_emotion_burst():
+    frame_files = request.files.getlist("frames")
+    if not frame_files:
+        return jsonify({"error": "No frames uploaded"}), 400
+    if len(frame_files) > EMOTION_MAX_BURST_FRAMES:
+        return jsonify({"error": f"At most {EMOTION_MAX_BURST_FRAMES} frames per request"}), 400
+
+    if not model_ready():
+        return jsonify({"error": "Emotion model is still loading"}), 503, {"Retry-After": "5"}
+
+    timer = StageTimer()
+    blobs = [frame.read() for frame in frame_files]
+    with timer.stage("hash"):
+        key = result_cache.burst_key(blobs)
+        burst = result_cache.get(key)
+
+    if burst is None:
+        try:
+            burst = run_burst(blobs, timer)
+        except (QueueFull, BrokenProcessPool):
+            return overloaded()
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+        if burst[0] is not None:
+            result_cache.set(key, burst)
+
+    result, frames_used, confidence = burst
+    if result is None:
+        return jsonify({"error": "Invalid image format"}), 400
 
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return jsonify({
+        "emotion": result["dominant_emotion"],
+        "scores": result["emotion"],
+        "confidence": confidence,
+        "frames_used": frames_used,
+        "frames_received": len(frame_files)
+    }), 200, timing_headers(timer)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    # The debug reloader would import this module twice and load the model twice.
+    # Pool mode is the production setup: debug off, one request thread per connection
+    # handing work to the worker processes.
+    app.run(host="0.0.0.0", port=5000, debug=FLASK_DEBUG, use_reloader=False, threaded=True)
@@ -0,0 +1,140 @@
+import json
+import os
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from sentiment import UNKNOWN_PRIORITY
+
+# ✅ Load batch import settings from the .env file
+load_dotenv()
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "500"))
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "50000"))
+BATCH_ENRICH_CONCURRENCY = int(os.getenv("BATCH_ENRICH_CONCURRENCY", "8"))
+
+FEEDBACK_TYPES = ("text", "voice", "emotion")
+# The labels the emotion service can return (emotion_model.EMOTION_LABELS)
+EMOTIONS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+NEGATIVE_EMOTIONS = ("angry", "sad")
+
+
+def _optional_str(row, *keys):
+    """The first non-empty string among keys, or None; any other type is rejected."""
+    for key in keys:
+        value = row.get(key)
+        if value in (None, ""):
+            continue
+        if not isinstance(value, str):
+            raise ValueError(f"'{key}' must be a string")
+        if value.strip():
+            return value.strip()
+    return None
+
+
+def _required_str(row, *keys):
+    value = _optional_str(row, *keys)
+    if value is None:
+        raise ValueError(f"'{keys[0]}' is required")
+    return value
+
+
+def _parse_timestamp(value):
+    """Offline rows may carry the time they were collected; otherwise use now."""
+    if value in (None, ""):
+        return datetime.utcnow()
+    if not isinstance(value, str):
+        raise ValueError("'timestamp' must be an ISO 8601 string")
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"invalid timestamp '{value}'")
+    if parsed.tzinfo is not None:
+        # Stored timestamps are naive UTC like datetime.utcnow()
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_rating(value):
+    """An int or a string of digits; floats and booleans would be silently truncated by int()."""
+    if isinstance(value, str) and value.strip().isascii() and value.strip().isdigit():
+        return int(value.strip())
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError("'rating' must be an integer")
+
+
+def build_feedback_doc(row):
+    """
+    Validates one imported row and turns it into a feedback document shaped like
+    the ones the submit_* routes store. Returns (doc, text_to_enrich, category,
+    product); text_to_enrich is None when the row gets no sentiment/suggestion.
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("row must be a JSON object")
+
+    feedback_type = str(row.get("type", "text")).lower()
+    if feedback_type not in FEEDBACK_TYPES:
+        raise ValueError(f"unknown type '{feedback_type}'")
+
+    timestamp = _parse_timestamp(row.get("timestamp"))
+
+    if feedback_type in ("text", "voice"):
+        content = _required_str(row, "content", "feedback", "text")
+        category = _required_str(row, "category")
+        product = _required_str(row, "product")
+        doc = {
+            "type": feedback_type,
+            "category": category,
+            "product": product,
+            "content": content,
+            "timestamp": timestamp,
+            "priority": UNKNOWN_PRIORITY
+        }
+        return doc, content, category, product
+
+    emotion = _required_str(row, "emotion").lower()
+    if emotion not in EMOTIONS:
+        raise ValueError(f"unknown emotion '{emotion}'")
+    rating = _parse_rating(row.get("rating"))
+    if not 1 <= rating <= 5:
+        raise ValueError("'rating' must be between 1 and 5")
+
+    doc = {"type": "emotion", "emotion": emotion, "rating": rating, "timestamp": timestamp, "priority": UNKNOWN_PRIORITY}
+    category = _optional_str(row, "category")
+    product = _optional_str(row, "product")
+    if category:
+        doc["category"] = category
+    if product:
+        doc["product"] = product
+
+    reason = None
+    if emotion in NEGATIVE_EMOTIONS:
+        reason = _optional_str(row, "reason_text", "reason_voice", "content")
+        if reason:
+            doc["content"] = reason
+    return doc, reason, category or "General", product or "General"
+
+
+async def iter_ndjson(byte_chunks):
+    """
+    Yields (line_number, parsed_row_or_error) from a streamed NDJSON body without
+    buffering the whole upload. Blank lines are skipped; a line that is not valid
+    JSON yields the ValueError instead of a row.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in byte_chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, _decode_line(line)
+    if buffer.strip():
+        yield line_number + 1, _decode_line(buffer)
+
+
+def _decode_line(line):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"invalid JSON: {e}")
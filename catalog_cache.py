@@ -0,0 +1,80 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dotenv import load_dotenv
+
+# ✅ Load catalog cache settings from the .env file
+load_dotenv()
+# Safety net for writes that bypass the API (e.g. the dashboard's product form)
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+# "no-cache" lets browsers keep the lists but revalidate them with If-None-Match every time
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, no-cache")
+
+
+def make_etag(payload):
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+
+class CatalogCache:
+    """
+    In-memory copy of the category and product lists with precomputed ETags.
+    Loaded on first use, dropped by invalidate() after catalog writes and
+    reloaded at most every CATALOG_CACHE_TTL seconds. invalidate() also bumps a
+    generation counter, so a reload that was already reading when a write
+    happened is returned to its caller but not kept.
+    """
+
+    def __init__(self, ttl=CATALOG_CACHE_TTL):
+        self.ttl = ttl
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._stats = {"hits": 0, "loads": 0, "invalidations": 0}
+
+    async def get(self, category_collection, product_collection):
+        """Returns {"categories", "products", "catalog"} entries, each a (payload, etag) pair."""
+        snapshot = self._fresh_snapshot()
+        if snapshot:
+            return snapshot
+
+        # Only one request reloads; the others wait and reuse its result
+        async with self._lock:
+            snapshot = self._fresh_snapshot()
+            if snapshot:
+                return snapshot
+
+            generation = self._generation
+            categories = await category_collection.find({}, {"_id": 0, "name": 1}).to_list(None)
+            products = await product_collection.find({}, {"_id": 0, "name": 1, "price": 1}).to_list(None)
+            category_names = [cat["name"] for cat in categories]
+
+            payloads = {
+                "categories": {"categories": category_names},
+                "products": {"products": products},
+                "catalog": {"categories": category_names, "products": products},
+            }
+            snapshot = {name: (payload, make_etag(payload)) for name, payload in payloads.items()}
+            self._stats["loads"] += 1
+            # A write invalidated the cache while we were reading; this snapshot may predate it
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._loaded_at = time.monotonic()
+            return snapshot
+
+    def invalidate(self):
+        self._generation += 1
+        self._snapshot = None
+        self._stats["invalidations"] += 1
+
+    def stats(self):
+        return {**self._stats, "cached": self._snapshot is not None}
+
+    def _fresh_snapshot(self):
+        if self._snapshot is not None and time.monotonic() - self._loaded_at < self.ttl:
+            self._stats["hits"] += 1
+            return self._snapshot
+        return None
@@ -0,0 +1,52 @@
+import io
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import seaborn as sns
+import streamlit as st
+
+# ✅ Rendered dashboard charts as PNG bytes. st.cache_data keys each chart on a
+# hash of the aggregated data passed in, so reruns (and other sessions) that see
+# the same numbers reuse the image instead of running matplotlib again.
+CHART_CACHE_ENTRIES = 32
+
+
+def _png(fig):
+    """Renders with st.pyplot's defaults and closes the figure so pyplot does not keep it alive."""
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format="png", bbox_inches="tight", dpi=200)
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def emotion_trend_chart(trend_df):
+    fig, ax = plt.subplots(figsize=(10, 4))
+    trend_df.plot(ax=ax, marker="o")
+    ax.set_title("Daily Emotion Trends", fontsize=10)
+    ax.set_xlabel("Date", fontsize=8)
+    ax.set_ylabel("Count", fontsize=8)
+    ax.tick_params(axis='x', rotation=45, labelsize=6)
+    ax.tick_params(axis='y', labelsize=6)
+    return _png(fig)
+
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def emotion_distribution_chart(emotion_counts):
+    fig, ax = plt.subplots(figsize=(1.5, 0.5))
+    sns.barplot(x=emotion_counts.index, y=emotion_counts.values, hue=emotion_counts.index, ax=ax, palette="coolwarm", legend=False)
+    ax.tick_params(axis="x", labelsize=3)
+    ax.tick_params(axis="y", labelsize=3)
+    ax.set_xlabel("-----> Emotion", fontsize=2)
+    ax.set_ylabel("-----> Count", fontsize=2)
+    ax.set_title("Emotion Distribution", fontsize=4)
+    return _png(fig)
+
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def feedback_type_chart(feedback_counts):
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.pie(feedback_counts, labels=feedback_counts.index, autopct="%1.1f%%", colors=sns.color_palette("pastel"), textprops={"fontsize": 3})
+    return _png(fig)
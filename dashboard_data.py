@@ -0,0 +1,135 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+import streamlit as st
+from bson import ObjectId
+from pymongo import MongoClient
+from dotenv import load_dotenv
+from dashboard_queries import feedback_overview, rollup_overview
+from ral_retrieval import FeedbackIndex, feedback_stats
+from rollups import ROLLUP_MARKER_ID
+
+# ✅ Load dashboard data settings from the .env file
+load_dotenv()
+MONGO_URI = os.getenv("MONGO_URI")
+# ObjectIds from different writers are only ordered to the second, so each
+# incremental fetch re-reads this much before the watermark and drops duplicates
+DASHBOARD_WATERMARK_OVERLAP = timedelta(seconds=int(os.getenv("DASHBOARD_WATERMARK_OVERLAP", "5")))
+# Only what Ask RAL and the watermark read; the table and charts query Mongo directly
+FEEDBACK_FRAME_FIELDS = {
+    field: 1 for field in (
+        "type", "content", "suggestion", "category", "product", "sentiment",
+        "rating", "emotion", "timestamp", "enrichment_status"
+    )
+}
+
+
+@st.cache_resource
+def get_mongo_client():
+    """One MongoClient (and connection pool) per Streamlit process instead of one per rerun."""
+    return MongoClient(MONGO_URI)
+
+
+class FeedbackFrame:
+    """
+    The feedbacks collection as a DataFrame that is loaded once and then
+    extended on every sync with documents written after the high-water mark.
+    The watermark is the insert time inside _id rather than the feedback
+    timestamp, so offline imports with old timestamps are still picked up.
+    Rows still waiting for enrichment are re-read until they are done.
+    Only FEEDBACK_FRAME_FIELDS are loaded, and only once Ask RAL needs them.
+    """
+
+    def __init__(self):
+        self.df = pd.DataFrame()
+        self.watermark = None
+        self.as_of = None
+        self.enriched = 0  # pending rows seen finishing enrichment since the last full load
+        self._lock = threading.Lock()
+
+    def sync(self, collection, full=False):
+        """Brings the frame up to date and returns (DataFrame, as_of UTC datetime)."""
+        with self._lock:
+            if full or self.watermark is None:
+                docs = list(collection.find({}, FEEDBACK_FRAME_FIELDS).sort("_id", 1))
+                self.df = pd.DataFrame(docs)
+                self.watermark = docs[-1]["_id"].generation_time if docs else None
+                self.enriched = 0
+            else:
+                self._append_new(collection)
+            self.as_of = datetime.now(timezone.utc)
+            return self.df, self.as_of
+
+    def version(self):
+        """
+        Changes whenever the frame's contents do; used as a cache key for derived data.
+        Late enrichment changes rows without adding any, so it is counted separately.
+        """
+        return (self.watermark.isoformat() if self.watermark else None, len(self.df), self.enriched)
+
+    def _append_new(self, collection):
+        cutoff = ObjectId.from_datetime(self.watermark - DASHBOARD_WATERMARK_OVERLAP)
+        docs = list(collection.find({"_id": {"$gte": cutoff}}, FEEDBACK_FRAME_FIELDS).sort("_id", 1))
+
+        pending = []
+        if "enrichment_status" in self.df.columns:
+            pending = self.df.loc[self.df["enrichment_status"] == "pending", "_id"].tolist()
+            if pending:
+                docs += collection.find(
+                    {"_id": {"$in": pending, "$lt": cutoff}, "enrichment_status": {"$ne": "pending"}}, FEEDBACK_FRAME_FIELDS
+                )
+
+        if not docs:
+            return
+        waiting = set(pending)
+        self.enriched += sum(1 for doc in docs if doc["_id"] in waiting and doc.get("enrichment_status") != "pending")
+        fresh = pd.DataFrame(docs)
+        kept = self.df[~self.df["_id"].isin(fresh["_id"])] if not self.df.empty else self.df
+        self.df = pd.concat([kept, fresh], ignore_index=True)
+        self.watermark = max(self.watermark, max(doc["_id"].generation_time for doc in docs))
+
+
+@st.cache_resource
+def get_feedback_frame():
+    """Shared by every session of this Streamlit process."""
+    return FeedbackFrame()
+
+
+def data_version(collection):
+    """
+    Cheap per-rerun key for the aggregated metrics: the newest _id changes with
+    every stored feedback and the newest enriched_at with every late enrichment.
+    Both are single index reads, so nothing is loaded until Ask RAL needs it.
+    """
+    newest = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    enriched = collection.find_one({}, {"enriched_at": 1}, sort=[("enriched_at", -1)])
+    return (
+        str(newest["_id"]) if newest else None,
+        enriched["enriched_at"].isoformat() if enriched and enriched.get("enriched_at") else None
+    )
+
+
+@st.cache_data(show_spinner=False)
+def load_overview(_rollup_collection, _feedback_collection, data_version):
+    """
+    Aggregated metrics, recomputed only when data_version changes. Read from
+    feedback_rollups once `python rollups.py --rebuild` has backfilled them;
+    before that the rollups only hold feedback written since deploy, so the
+    raw feedbacks are aggregated instead.
+    """
+    if _rollup_collection.find_one({"_id": ROLLUP_MARKER_ID}, {"_id": 1}):
+        return rollup_overview(_rollup_collection)
+    return feedback_overview(_feedback_collection)
+
+
+@st.cache_resource
+def get_feedback_index():
+    """Ask RAL retrieval index, shared by every session and extended as feedback arrives."""
+    return FeedbackIndex()
+
+
+@st.cache_data(show_spinner=False)
+def load_feedback_stats(_df, data_version):
+    """Per-product/category summaries for Ask RAL, recomputed only when the data changes."""
+    return feedback_stats(_df)
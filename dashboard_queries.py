@@ -0,0 +1,170 @@
+import pandas as pd
+from sentiment import UNKNOWN_PRIORITY
+from feedback_table import TABLE_FIELDS
+
+EMOTION_ORDER = ["happy", "sad", "surprise", "neutral", "angry"]
+
+# Timestamps are stored as dates, but older documents may hold ISO strings
+_FEEDBACK_DATE = {
+    "$dateToString": {
+        "format": "%Y-%m-%d",
+        "date": {"$convert": {"input": "$timestamp", "to": "date", "onError": None, "onNull": None}}
+    }
+}
+
+# ✅ One round trip: every section's numbers come back as a few small arrays
+OVERVIEW_PIPELINE = [
+    {"$facet": {
+        "by_type": [
+            {"$group": {"_id": "$type", "count": {"$sum": 1}}}
+        ],
+        "emotions": [
+            {"$match": {"type": "emotion"}},
+            {"$group": {"_id": {"$ifNull": ["$emotion", "Not Available"]}, "count": {"$sum": 1}}}
+        ],
+        "emotion_trend": [
+            {"$match": {"type": "emotion"}},
+            {"$group": {"_id": {"date": _FEEDBACK_DATE, "emotion": "$emotion"}, "count": {"$sum": 1}}}
+        ]
+    }}
+]
+
+
+# ✅ The same numbers from feedback_rollups (one document per day, type, product
+# and category, kept current by the server), so the cost follows the number of
+# days rather than the number of feedbacks
+ROLLUP_OVERVIEW_PIPELINE = [
+    # Skips the rebuild marker, whose _id is a plain string
+    {"$match": {"_id.date": {"$exists": True}}},
+    {"$facet": {
+        "by_type": [
+            {"$group": {"_id": "$_id.type", "count": {"$sum": "$count"}}}
+        ],
+        "emotion_trend": [
+            {"$match": {"_id.type": "emotion"}},
+            {"$project": {"date": "$_id.date", "emotions": {"$objectToArray": {"$ifNull": ["$emotions", {}]}}}},
+            {"$unwind": "$emotions"},
+            {"$group": {"_id": {"date": "$date", "emotion": "$emotions.k"}, "count": {"$sum": "$emotions.v"}}}
+        ]
+    }}
+]
+
+
+def _overview_frames(by_type_rows, emotion_rows, trend_rows):
+    by_type = pd.Series(
+        {row["_id"]: row["count"] for row in by_type_rows if row["_id"] is not None},
+        dtype="int64"
+    ).sort_values(ascending=False)
+    total = sum(row["count"] for row in by_type_rows)
+
+    emotions = pd.Series(
+        {row["_id"]: row["count"] for row in emotion_rows}, dtype="int64"
+    ).reindex(EMOTION_ORDER, fill_value=0)
+
+    trend_rows = [
+        {"date": row["_id"]["date"], "emotion": row["_id"]["emotion"], "count": row["count"]}
+        for row in trend_rows
+        if row["_id"].get("date") and row["_id"].get("emotion")
+    ]
+    if trend_rows:
+        trend = pd.DataFrame(trend_rows).pivot_table(
+            index="date", columns="emotion", values="count", aggfunc="sum", fill_value=0
+        )
+        trend.index = pd.to_datetime(trend.index).date
+        trend = trend.sort_index()
+    else:
+        trend = pd.DataFrame()
+
+    return {"total": total, "by_type": by_type, "emotions": emotions, "trend": trend}
+
+
+def feedback_overview(feedback_collection):
+    """
+    Aggregates the Key Metrics, Emotion Trend and Emotion Distribution numbers
+    inside Mongo and returns them as small pandas objects:
+    total, by_type (Series), emotions (Series in EMOTION_ORDER) and trend
+    (DataFrame of counts, one row per date and one column per emotion).
+    """
+    facets = next(feedback_collection.aggregate(OVERVIEW_PIPELINE), {})
+    return _overview_frames(facets.get("by_type", []), facets.get("emotions", []), facets.get("emotion_trend", []))
+
+
+def rollup_overview(rollup_collection):
+    """feedback_overview computed from feedback_rollups instead of the raw feedbacks."""
+    facets = next(rollup_collection.aggregate(ROLLUP_OVERVIEW_PIPELINE), {})
+    trend_rows = facets.get("emotion_trend", [])
+    emotions = {}
+    for row in trend_rows:
+        emotion = row["_id"].get("emotion")
+        emotions[emotion] = emotions.get(emotion, 0) + row["count"]
+    emotion_rows = [{"_id": emotion, "count": count} for emotion, count in emotions.items()]
+    return _overview_frames(facets.get("by_type", []), emotion_rows, trend_rows)
+
+
+# ✅ Feedback table pages, sorted in Mongo on indexed fields
+SUGGESTION_TYPES = ["text", "voice"]
+
+# Each sort option is a list of (filter, sort) segments read one after another,
+# so "least priority" can put positive first and still keep unknown sentiment last
+SORT_SEGMENTS = {
+    "Newest First": [({}, [("timestamp", -1)])],
+    "Oldest First": [({}, [("timestamp", 1)])],
+    "Most Priority First (Negative Sentiment)": [({}, [("priority", 1), ("timestamp", -1)])],
+    "Least Priority First (Positive Sentiment)": [
+        ({"priority": {"$lt": UNKNOWN_PRIORITY}}, [("priority", -1), ("timestamp", -1)]),
+        ({"priority": {"$gte": UNKNOWN_PRIORITY}}, [("timestamp", -1)]),
+    ],
+}
+
+
+def _type_filter(feedback_type):
+    return {} if feedback_type in (None, "All") else {"type": feedback_type}
+
+
+def count_feedback(feedback_collection, feedback_type="All"):
+    return feedback_collection.count_documents(_type_filter(feedback_type))
+
+
+def _read_segments(collection, segments, skip, limit, projection):
+    docs = []
+    for query, sort in segments:
+        if len(segments) > 1:
+            size = collection.count_documents(query)
+            if skip >= size:
+                skip -= size
+                continue
+        cursor = collection.find(query, projection).sort(sort).skip(skip).limit(limit - len(docs))
+        docs.extend(cursor)
+        skip = 0
+        if len(docs) >= limit:
+            break
+    return docs
+
+
+def feedback_page(feedback_collection, feedback_type, sort_option, page, page_size):
+    """One page (1-based) of the feedback table, filtered and sorted inside Mongo."""
+    segments = [
+        ({**_type_filter(feedback_type), **query}, sort)
+        for query, sort in SORT_SEGMENTS[sort_option]
+    ]
+    projection = {"_id": 0, **{field: 1 for field in TABLE_FIELDS}}
+    return _read_segments(feedback_collection, segments, (page - 1) * page_size, page_size, projection)
+
+
+def _suggestion_filter(feedback_type):
+    types = SUGGESTION_TYPES if feedback_type in (None, "All") else [feedback_type]
+    return {"type": {"$in": types}, "suggestion": {"$nin": [None, ""]}}
+
+
+def count_suggestions(feedback_collection, feedback_type="All"):
+    return feedback_collection.count_documents(_suggestion_filter(feedback_type))
+
+
+def suggestion_page(feedback_collection, feedback_type, page, page_size):
+    """Newest AI suggestions first, one page at a time."""
+    return list(
+        feedback_collection.find(_suggestion_filter(feedback_type), {"_id": 0, "type": 1, "content": 1, "suggestion": 1})
+        .sort("timestamp", -1)
+        .skip((page - 1) * page_size)
+        .limit(page_size)
+    )
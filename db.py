@@ -0,0 +1,58 @@
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+# ✅ Load MongoDB connection and pool settings from the .env file
+load_dotenv()
+MONGO_URI = os.getenv("MONGO_URI")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+MONGO_MAX_IDLE_MS = int(os.getenv("MONGO_MAX_IDLE_MS", "60000"))
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "5000"))
+# e.g. "1" for fast acknowledged writes or "majority" for replica-safe writes; unset keeps the URI's setting
+MONGO_WRITE_CONCERN = os.getenv("MONGO_WRITE_CONCERN")
+MONGO_JOURNAL = os.getenv("MONGO_JOURNAL")
+
+
+class MongoPool:
+    """
+    Async (Motor) client for the FastAPI server and the collections its routes use.
+    connect() and close() are called from the app lifespan so the pool lives on
+    the server's event loop.
+    """
+
+    def __init__(self):
+        self.client = None
+
+    def connect(self):
+        options = {
+            "maxPoolSize": MONGO_MAX_POOL_SIZE,
+            "minPoolSize": MONGO_MIN_POOL_SIZE,
+            "maxIdleTimeMS": MONGO_MAX_IDLE_MS,
+            "serverSelectionTimeoutMS": MONGO_TIMEOUT_MS,
+            "connectTimeoutMS": MONGO_TIMEOUT_MS,
+        }
+        if MONGO_WRITE_CONCERN:
+            options["w"] = int(MONGO_WRITE_CONCERN) if MONGO_WRITE_CONCERN.isdigit() else MONGO_WRITE_CONCERN
+        if MONGO_JOURNAL:
+            options["journal"] = MONGO_JOURNAL.lower() == "true"
+
+        print("Mongo URI:", MONGO_URI)  # Debugging line to check the Mongo URI
+        self.client = AsyncIOMotorClient(MONGO_URI, **options)
+
+        feedback_db = self.client["FeedbackDB"]
+        self.feedback_db = feedback_db
+        self.feedbacks = feedback_db["feedbacks"]
+        self.categories = feedback_db["feedback_categories"]
+        self.products = feedback_db["Products"]
+        self.suggestion_cache = feedback_db["suggestion_cache"]
+        self.notification_outbox = feedback_db["notification_outbox"]
+        self.feedback_rollups = feedback_db["feedback_rollups"]
+
+        shopkeeper_db = self.client["ShopkeepersDB"]
+        self.shopkeepers = shopkeeper_db["shopkeepers"]
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
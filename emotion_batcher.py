@@ -0,0 +1,80 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from dotenv import load_dotenv
+
+# ✅ Load batching settings from the .env file
+load_dotenv()
+EMOTION_BATCH_SIZE = int(os.getenv("EMOTION_BATCH_SIZE", "8"))
+EMOTION_BATCH_WAIT_MS = float(os.getenv("EMOTION_BATCH_WAIT_MS", "5"))
+
+
+class MicroBatcher:
+    """
+    Collects faces submitted by concurrent requests for up to max_wait_ms (or until
+    max_batch faces are waiting), runs predict_fn once on the stacked batch and
+    hands each request its own row of the result.
+    """
+
+    def __init__(self, predict_fn, max_batch=EMOTION_BATCH_SIZE, max_wait_ms=EMOTION_BATCH_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "items": 0, "largest_batch": 0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="emotion-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, face):
+        """Queues one (48, 48) face and returns a Future resolving to its probability row."""
+        self.start()
+        future = Future()
+        self._queue.put((face, future))
+        return future
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_batch"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["max_batch"] = self.max_batch
+        stats["max_wait_ms"] = self.max_wait * 1000
+        return stats
+
+    def _collect(self):
+        items = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            try:
+                probabilities = self.predict_fn(np.stack([face for face, _ in items]))
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), row in zip(items, probabilities):
+                future.set_result(row)
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["items"] += len(items)
+                self._stats["largest_batch"] = max(self._stats["largest_batch"], len(items))
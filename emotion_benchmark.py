@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def load_corpus(image_dir):
+    """
+    Reads every image under image_dir as (name, expected_label, bytes). Images
+    inside a folder named after an emotion (happy/, sad/, ...) use that folder
+    as the expected label; anything else has no label.
+    """
+    from emotion_model import EMOTION_LABELS
+
+    corpus = []
+    for root, _, files in os.walk(image_dir):
+        folder = os.path.basename(root).lower()
+        label = folder if folder in EMOTION_LABELS else None
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                with open(os.path.join(root, name), "rb") as f:
+                    corpus.append((os.path.relpath(os.path.join(root, name), image_dir), label, f.read()))
+    return corpus
+
+
+def _psutil_peak_mb(pid):
+    """Peak working set on Windows through psutil, if it is installed; None otherwise."""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        peak = getattr(psutil.Process(pid).memory_info(), "peak_wset", None)
+    except psutil.Error:
+        return None
+    return round(peak / (1024 * 1024), 1) if peak else None
+
+
+def peak_rss_mb(pid=None):
+    """
+    Peak resident memory of this process, or of another local process (e.g. the
+    server) by pid. None where neither /proc, resource nor psutil can tell.
+    """
+    if pid:
+        if not os.path.exists(f"/proc/{pid}/status"):
+            return _psutil_peak_mb(pid)
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+        return None
+    try:
+        import resource
+    except ImportError:  # Windows
+        return _psutil_peak_mb(os.getpid())
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def run_load(call, corpus, total, concurrency, warmup):
+    """
+    Sends total requests cycling through the corpus from concurrency threads,
+    after warmup untimed ones. Returns (latencies in ms, wall seconds,
+    {name: predicted label}, error count).
+    """
+    for i in range(warmup):
+        call(corpus[i % len(corpus)][2])
+
+    latencies = []
+    predictions = {}
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(i):
+        name, _, data = corpus[i % len(corpus)]
+        start = time.perf_counter()
+        try:
+            label = call(data)
+        except Exception:
+            with lock:
+                errors[0] += 1
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            predictions.setdefault(name, label)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return latencies, time.perf_counter() - start, predictions, errors[0]
+
+
+def summarize(latencies, wall, predictions, errors, corpus, baseline=None):
+    """Latency percentiles, throughput and label agreement for one run."""
+    report = {"requests": len(latencies), "errors": errors, "wall_seconds": round(wall, 3)}
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report.update(
+            p50_ms=round(float(p50), 2),
+            p95_ms=round(float(p95), 2),
+            p99_ms=round(float(p99), 2),
+            mean_ms=round(float(np.mean(latencies)), 2),
+            images_per_second=round(len(latencies) / wall, 2)
+        )
+
+    # Agreement only counts images that were actually predicted, so errors show
+    # up in coverage (predicted / total) instead of looking like model mismatches
+    if corpus:
+        report["coverage"] = round(len(predictions) / len(corpus), 4)
+    expected = {name: label for name, label, _ in corpus if label and name in predictions}
+    if expected:
+        matches = [predictions[name] == label for name, label in expected.items()]
+        report["label_agreement"] = round(sum(matches) / len(matches), 4)
+    if baseline is not None:
+        # Agreement with the first detector backend's labels, for unlabelled corpora
+        shared = [name for name in predictions if name in baseline]
+        if shared:
+            report["baseline_agreement"] = round(sum(predictions[n] == baseline[n] for n in shared) / len(shared), 4)
+    return report
+
+
+def http_caller(url, timeout):
+    session = requests.Session()
+
+    def call(data):
+        res = session.post(f"{url}/detect_emotion", files={"image": ("frame.jpg", data, "image/jpeg")}, timeout=timeout)
+        res.raise_for_status()
+        return res.json()["emotion"]
+
+    return call
+
+
+def direct_caller():
+    import emotion_model
+    from emotion_preprocess import StageTimer
+
+    def call(data):
+        result = emotion_model.analyze_images([data], StageTimer())[0]
+        if result is None:
+            raise ValueError("Invalid image format")
+        return result["dominant_emotion"]
+
+    return call
+
+
+def benchmark_http(args, corpus):
+    try:
+        server = requests.get(f"{args.url}/readyz", timeout=args.timeout).json()
+    except Exception as e:
+        server = {"error": str(e)}
+    latencies, wall, predictions, errors = run_load(
+        http_caller(args.url, args.timeout), corpus, args.requests, args.concurrency, args.warmup
+    )
+    report = summarize(latencies, wall, predictions, errors, corpus)
+    report["server_peak_rss_mb"] = peak_rss_mb(args.server_pid) if args.server_pid else None
+    return {server.get("detector_backend", "server"): report}, server
+
+
+def benchmark_direct(args, corpus):
+    import emotion_model
+
+    results = {}
+    baseline = None
+    for detector in args.detectors:
+        # detect_face reads the module setting on every call
+        emotion_model.EMOTION_DETECTOR_BACKEND = detector
+        emotion_model.load_and_warm()
+        latencies, wall, predictions, errors = run_load(
+            direct_caller(), corpus, args.requests, args.concurrency, args.warmup
+        )
+        report = summarize(latencies, wall, predictions, errors, corpus, baseline)
+        # Process-wide high-water mark, so later backends include earlier ones
+        report["peak_rss_mb"] = peak_rss_mb()
+        results[detector] = report
+        if baseline is None:
+            baseline = predictions
+    return results, emotion_model.status()
+
+
+# ✅ python emotion_benchmark.py --images faces/ --url http://localhost:5000 --concurrency 8
+#    (start the server with EMOTION_CACHE_SIZE=0 so repeated corpus images are really analyzed)
+# ✅ python emotion_benchmark.py --images faces/ --direct --detectors opencv,ssd,mtcnn
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the emotion detection service")
+    parser.add_argument("--images", required=True, help="image corpus; emotion-named subfolders give expected labels")
+    parser.add_argument("--url", default="http://localhost:5000", help="service to drive over HTTP")
+    parser.add_argument("--direct", action="store_true", help="call the analyze pipeline in-process instead of over HTTP")
+    parser.add_argument("--detectors", default=os.getenv("EMOTION_DETECTOR_BACKEND", "opencv"),
+                        help="comma-separated detector backends to compare (direct mode)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per run")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed requests before each run")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--server-pid", type=int, help="local server pid, to report its peak RSS")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    args.detectors = [d.strip() for d in args.detectors.split(",") if d.strip()]
+
+    corpus = load_corpus(args.images)
+    if not corpus:
+        parser.error(f"no images found in {args.images}")
+
+    if args.direct:
+        runs, service = benchmark_direct(args, corpus)
+    else:
+        runs, service = benchmark_http(args, corpus)
+
+    report = {
+        "mode": "direct" if args.direct else "http",
+        "target": None if args.direct else args.url,
+        "images": len(corpus),
+        "labelled_images": sum(1 for _, label, _ in corpus if label),
+        "concurrency": args.concurrency,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "service": service,
+        "runs": runs
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"✅ Benchmark report written to {args.output}")
+    else:
+        print(output)
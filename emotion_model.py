@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+from emotion_preprocess import decode_frame, cap_long_edge
+
+# ✅ Load emotion service settings from the .env file
+load_dotenv()
+EMOTION_DETECTOR_BACKEND = os.getenv("EMOTION_DETECTOR_BACKEND", "opencv")
+# keras | onnx | onnx-int8 (the ONNX files come from: python emotion_onnx.py export)
+EMOTION_BACKEND = os.getenv("EMOTION_BACKEND", "keras").lower()
+EMOTION_READY_TIMEOUT = float(os.getenv("EMOTION_READY_TIMEOUT", "120"))
+EMOTION_WARMUP_BATCH = int(os.getenv("EMOTION_BATCH_SIZE", "8"))
+# Alignment rotates the crop so the eyes are level; turning it off saves time on cheap detectors
+EMOTION_ALIGN = os.getenv("EMOTION_ALIGN", "true").lower() == "true"
+# A frame burst stops early once the averaged top emotion reaches this probability
+EMOTION_BURST_CONFIDENCE = float(os.getenv("EMOTION_BURST_CONFIDENCE", "0.6"))
+EMOTION_BURST_MIN_FRAMES = int(os.getenv("EMOTION_BURST_MIN_FRAMES", "2"))
+
+# Output order of DeepFace's emotion model
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+
+_emotion_model = None
+
+_ready = threading.Event()
+_load_lock = threading.Lock()
+_status = {"ready": False, "loading": False, "error": None, "cold_start_seconds": None}
+
+
+def _deepface():
+    # Imported lazily: TensorFlow takes seconds to import, and /healthz must answer meanwhile
+    from deepface import DeepFace
+    return DeepFace
+
+
+def build_emotion_model(backend=EMOTION_BACKEND):
+    """Returns an object with a Keras-style predict(batch) for the configured inference backend."""
+    if backend in ("onnx", "onnx-int8"):
+        from emotion_onnx import load_onnx_model
+        return load_onnx_model(int8=backend == "onnx-int8")
+    if backend != "keras":
+        raise ValueError(f"Unknown EMOTION_BACKEND '{backend}'")
+
+    DeepFace = _deepface()
+    try:
+        client = DeepFace.build_model(task="facial_attribute", model_name="Emotion")
+    except TypeError:
+        # Older DeepFace releases take only the model name
+        client = DeepFace.build_model("Emotion")
+    # Newer releases wrap the Keras model in a client object
+    return getattr(client, "model", client)
+
+
+def load_and_warm():
+    """
+    Loads the emotion model and the face detector and runs one dummy inference so
+    TensorFlow builds its graph before the first customer arrives. Safe to call
+    more than once; only the first call does the work.
+    """
+    global _emotion_model
+    with _load_lock:
+        if _ready.is_set():
+            return
+        _status["loading"] = True
+        start = time.perf_counter()
+        try:
+            _emotion_model = build_emotion_model()
+            # A blank frame has no face, so the detector runs and falls back to the whole frame
+            dummy = np.full((224, 224, 3), 128, dtype=np.uint8)
+            face, _ = detect_face(dummy)
+            # Warm the batch shapes the micro-batcher will use, not just batch size 1
+            predict_faces(np.stack([face] * EMOTION_WARMUP_BATCH))
+        except Exception as e:
+            _status["error"] = str(e)
+            print(f"❌ Emotion model warmup failed: {e}")
+            return
+        finally:
+            _status["loading"] = False
+
+        _status["cold_start_seconds"] = round(time.perf_counter() - start, 3)
+        _status["error"] = None
+        _status["ready"] = True
+        _ready.set()
+        print(f"✅ Emotion model ready ({EMOTION_BACKEND}, {EMOTION_DETECTOR_BACKEND} detector) in {_status['cold_start_seconds']}s")
+
+
+def start_background_warmup():
+    """Loads the model on a background thread so the process can serve /healthz while it warms up."""
+    threading.Thread(target=load_and_warm, name="emotion-warmup", daemon=True).start()
+
+
+def wait_until_ready(timeout=EMOTION_READY_TIMEOUT):
+    """
+    Blocks until the model is warm. If nothing is loading it (preload disabled or
+    a failed warmup), loads it on the calling thread instead.
+    """
+    if not _ready.is_set() and not _status["loading"]:
+        load_and_warm()
+    return _ready.wait(timeout)
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def status():
+    return dict(_status, backend=EMOTION_BACKEND, detector_backend=EMOTION_DETECTOR_BACKEND)
+
+
+def detect_face(img):
+    """
+    Finds the first face in a BGR frame and returns (48x48 grayscale float face
+    in [0, 1], region dict). The face is cropped once and only that crop is
+    converted for the emotion model. Without a detectable face the whole frame is
+    used, like DeepFace.analyze with enforce_detection=False.
+    """
+    faces = _deepface().extract_faces(
+        img, detector_backend=EMOTION_DETECTOR_BACKEND, enforce_detection=False, align=EMOTION_ALIGN
+    )
+    face_obj = faces[0]
+    # extract_faces returns an RGB float image in [0, 1]
+    face = np.asarray(face_obj["face"], dtype=np.float32)
+    if face.ndim == 3:
+        face = cv2.cvtColor(face, cv2.COLOR_RGB2GRAY)
+    face = cv2.resize(face, (48, 48))
+    return face, face_obj.get("facial_area", {})
+
+
+def predict_faces(faces):
+    """Runs the emotion CNN on an (N, 48, 48) stack of faces and returns (N, 7) probabilities."""
+    batch = np.expand_dims(np.asarray(faces, dtype=np.float32), axis=-1)
+    return np.asarray(_emotion_model.predict(batch, verbose=0))
+
+
+def to_result(probabilities, region=None):
+    """Formats one probability row like DeepFace.analyze: percentages plus the dominant emotion."""
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    scores = 100 * probabilities / probabilities.sum()
+    emotion = {label: round(float(score), 4) for label, score in zip(EMOTION_LABELS, scores)}
+    return {
+        "emotion": emotion,
+        "dominant_emotion": EMOTION_LABELS[int(np.argmax(scores))],
+        "region": region or {}
+    }
+
+
+def analyze_images(blobs, timer, classify=predict_faces):
+    """
+    Full pipeline for raw uploaded image bytes: reduced decode, long-edge cap,
+    face detection and classification of all crops in one classify() call.
+    Returns one result per blob, or None where the bytes were not an image.
+    """
+    frames = []
+    for data in blobs:
+        with timer.stage("decode"):
+            img = decode_frame(data)
+        if img is not None:
+            with timer.stage("resize"):
+                img = cap_long_edge(img)
+        frames.append(img)
+
+    with timer.stage("detect"):
+        detections = [detect_face(img) for img in frames if img is not None]
+
+    rows = []
+    if detections:
+        with timer.stage("infer"):
+            rows = classify(np.stack([face for face, _ in detections]))
+
+    results = []
+    analyzed = iter(zip(rows, detections))
+    for img in frames:
+        if img is None:
+            results.append(None)
+        else:
+            row, (_, region) = next(analyzed)
+            results.append(to_result(row, region))
+    return results
+
+
+def analyze_burst(blobs, timer, classify=predict_faces,
+                  threshold=EMOTION_BURST_CONFIDENCE, min_frames=EMOTION_BURST_MIN_FRAMES):
+    """
+    Scores a burst of frames in order, averaging their emotion probabilities, and
+    stops as soon as at least min_frames have been scored and the averaged top
+    emotion reaches threshold. Frames that are not images are skipped. Returns
+    (result, frames_used, confidence), with result None if no frame was usable.
+    """
+    total = np.zeros(len(EMOTION_LABELS))
+    frames_used = 0
+    region = None
+    confidence = 0.0
+    for data in blobs:
+        with timer.stage("decode"):
+            img = decode_frame(data)
+        if img is None:
+            continue
+        with timer.stage("resize"):
+            img = cap_long_edge(img)
+        with timer.stage("detect"):
+            face, face_region = detect_face(img)
+        with timer.stage("infer"):
+            row = np.asarray(classify(face[np.newaxis])[0], dtype=np.float64)
+
+        total += row / row.sum()
+        frames_used += 1
+        region = region or face_region
+        confidence = float(total.max() / frames_used)
+        if frames_used >= min_frames and confidence >= threshold:
+            break
+
+    if not frames_used:
+        return None, 0, 0.0
+    return to_result(total / frames_used, region), frames_used, round(confidence, 4)
+
+
+def analyze(img):
+    """Emotion analysis of one frame without batching."""
+    face, region = detect_face(img)
+    return to_result(predict_faces(face[np.newaxis])[0], region)
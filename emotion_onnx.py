@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+from dotenv import load_dotenv
+
+# ✅ Load ONNX backend settings from the .env file
+# Needs onnxruntime at serving time, plus tensorflow and tf2onnx to export
+load_dotenv()
+EMOTION_ONNX_PATH = os.getenv("EMOTION_ONNX_PATH", "models/emotion.onnx")
+EMOTION_ONNX_INT8_PATH = os.getenv("EMOTION_ONNX_INT8_PATH", "models/emotion.int8.onnx")
+# 0 lets ONNX Runtime pick; use 1 per worker when EMOTION_SERVING_MODE=pool
+EMOTION_ONNX_THREADS = int(os.getenv("EMOTION_ONNX_THREADS", "0"))
+
+
+class OnnxEmotionModel:
+    """Runs an exported emotion model with ONNX Runtime behind the Keras predict() interface."""
+
+    def __init__(self, path, threads=EMOTION_ONNX_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.path = path
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch, verbose=0):
+        return self.session.run(None, {self.input_name: np.asarray(batch, dtype=np.float32)})[0]
+
+
+def load_onnx_model(int8=False):
+    path = EMOTION_ONNX_INT8_PATH if int8 else EMOTION_ONNX_PATH
+    if not os.path.exists(path):
+        raise RuntimeError(f"{path} not found, run: python emotion_onnx.py export")
+    return OnnxEmotionModel(path)
+
+
+def export(keras_model, path=EMOTION_ONNX_PATH, int8_path=EMOTION_ONNX_INT8_PATH, opset=13):
+    """
+    Converts the Keras emotion model to ONNX with a dynamic batch dimension and
+    writes an int8 dynamically quantized copy next to it.
+    """
+    import tensorflow as tf
+    import tf2onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    spec = [tf.TensorSpec((None, 48, 48, 1), tf.float32, name="face")]
+    tf2onnx.convert.from_keras(keras_model, input_signature=spec, opset=opset, output_path=path)
+    print(f"✅ Exported emotion model to {path}")
+
+    os.makedirs(os.path.dirname(int8_path) or ".", exist_ok=True)
+    quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+    print(f"✅ Wrote int8 quantized model to {int8_path}")
+
+
+def load_reference_faces(image_dir):
+    """Detects and crops the face in every image under image_dir, the way the service does."""
+    import emotion_model
+    from emotion_preprocess import decode_frame, cap_long_edge
+
+    names, faces = [], []
+    for name in sorted(os.listdir(image_dir)):
+        with open(os.path.join(image_dir, name), "rb") as f:
+            img = decode_frame(f.read())
+        if img is None:
+            continue
+        face, _ = emotion_model.detect_face(cap_long_edge(img))
+        names.append(name)
+        faces.append(face)
+    return names, np.stack(faces)[..., np.newaxis]
+
+
+def parity(image_dir, keras_model):
+    """
+    Compares the ONNX and int8 ONNX models with the Keras model on a reference
+    image set: top-label agreement, largest probability difference and time per
+    batch.
+    """
+    names, batch = load_reference_faces(image_dir)
+    start = time.perf_counter()
+    reference = np.asarray(keras_model.predict(batch, verbose=0))
+    report = {
+        "images": len(names),
+        "keras": {"seconds": round(time.perf_counter() - start, 4)}
+    }
+    reference_labels = reference.argmax(axis=1)
+
+    for backend, path in (("onnx", EMOTION_ONNX_PATH), ("onnx-int8", EMOTION_ONNX_INT8_PATH)):
+        if not os.path.exists(path):
+            report[backend] = {"error": f"{path} not found"}
+            continue
+        model = OnnxEmotionModel(path)
+        start = time.perf_counter()
+        probabilities = model.predict(batch)
+        seconds = time.perf_counter() - start
+        labels = probabilities.argmax(axis=1)
+        report[backend] = {
+            "seconds": round(seconds, 4),
+            "label_agreement": round(float((labels == reference_labels).mean()), 4),
+            "max_abs_diff": round(float(np.abs(probabilities - reference).max()), 6),
+            "mismatches": [name for name, a, b in zip(names, labels, reference_labels) if a != b]
+        }
+    return report
+
+
+# ✅ python emotion_onnx.py export               -> write the ONNX and int8 models
+# ✅ python emotion_onnx.py parity --images DIR  -> compare them with Keras on DIR
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export and check the ONNX emotion model")
+    parser.add_argument("command", choices=["export", "parity"])
+    parser.add_argument("--images", help="directory of reference face images for parity")
+    args = parser.parse_args()
+
+    import emotion_model
+    keras_model = emotion_model.build_emotion_model("keras")
+    if args.command == "export":
+        export(keras_model)
+    else:
+        if not args.images:
+            parser.error("parity needs --images")
+        print(json.dumps(parity(args.images, keras_model), indent=2))
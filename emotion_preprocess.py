@@ -0,0 +1,90 @@
+import os
+import time
+from contextlib import contextmanager
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+
+# ✅ Load preprocessing settings from the .env file
+load_dotenv()
+# Frames are decoded at reduced resolution and downscaled so the long edge is at most this many pixels
+EMOTION_MAX_EDGE = int(os.getenv("EMOTION_MAX_EDGE", "640"))
+
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+# Start-of-frame markers carry the image size; C4, C8 and CC are other segments
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(data):
+    """Reads (width, height) from a JPEG header without decoding, or None if it is not a JPEG."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2
+            continue
+        if marker in _SOF_MARKERS:
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return width, height
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+
+def decode_frame(data, max_edge=EMOTION_MAX_EDGE):
+    """
+    Decodes image bytes to a BGR frame. Large JPEGs are decoded at 1/2, 1/4 or 1/8
+    scale by libjpeg itself, which skips most of the IDCT work, as long as the
+    result still has a long edge of at least max_edge. Returns None if the bytes
+    are not an image.
+    """
+    if not data:
+        return None
+    buffer = np.frombuffer(data, np.uint8)
+    size = jpeg_size(data)
+    if size and max_edge:
+        long_edge = max(size)
+        for factor, flag in _REDUCED_FLAGS:
+            if long_edge // factor >= max_edge:
+                return cv2.imdecode(buffer, flag)
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+
+def cap_long_edge(img, max_edge=EMOTION_MAX_EDGE):
+    """Downscales a frame so its long edge is at most max_edge; smaller frames are returned as-is."""
+    height, width = img.shape[:2]
+    long_edge = max(height, width)
+    if not max_edge or long_edge <= max_edge:
+        return img
+    scale = max_edge / long_edge
+    return cv2.resize(img, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+
+class StageTimer:
+    """Accumulates per-stage durations and renders them as a Server-Timing header."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def header(self):
+        return ", ".join(f"{name};dur={duration:.1f}" for name, duration in self.stages.items())
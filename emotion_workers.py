@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+from emotion_preprocess import StageTimer
+
+# ✅ Load worker pool settings from the .env file
+load_dotenv()
+EMOTION_WORKERS = int(os.getenv("EMOTION_WORKERS", str(os.cpu_count() or 1)))
+# Requests allowed to wait for a free worker; beyond this the service answers 503 right away
+EMOTION_QUEUE_SIZE = int(os.getenv("EMOTION_QUEUE_SIZE", "16"))
+EMOTION_RETRY_AFTER = os.getenv("EMOTION_RETRY_AFTER", "2")
+
+
+class QueueFull(Exception):
+    pass
+
+
+# Set in each worker process by _init_worker
+_warmup = None
+
+
+def _record_warmup(ready, error=None):
+    ready_counter, failed_counter, errors = _warmup
+    counter = ready_counter if ready else failed_counter
+    with counter.get_lock():
+        counter.value += 1
+    if error:
+        errors.put(error)
+
+
+def _init_worker(ready_counter, failed_counter, errors):
+    # Every worker process loads and warms its own copy of the model once
+    global _warmup
+    import emotion_model
+    _warmup = (ready_counter, failed_counter, errors)
+    emotion_model.load_and_warm()
+    if emotion_model.is_ready():
+        _record_warmup(True)
+    else:
+        _record_warmup(False, emotion_model.status()["error"])
+
+
+def _ensure_model():
+    """A worker whose warmup failed tries again on its next task instead of failing every request."""
+    import emotion_model
+    if emotion_model.is_ready():
+        return emotion_model
+    emotion_model.load_and_warm()
+    if not emotion_model.is_ready():
+        raise RuntimeError(f"Emotion model unavailable: {emotion_model.status()['error']}")
+    _, failed_counter, _ = _warmup
+    with failed_counter.get_lock():
+        failed_counter.value -= 1
+    _record_warmup(True)
+    return emotion_model
+
+
+def _analyze_in_worker(blobs):
+    emotion_model = _ensure_model()
+    timer = StageTimer()
+    results = emotion_model.analyze_images(blobs, timer)
+    return results, timer.stages
+
+
+def _analyze_burst_in_worker(blobs):
+    emotion_model = _ensure_model()
+    timer = StageTimer()
+    burst = emotion_model.analyze_burst(blobs, timer)
+    return burst, timer.stages
+
+
+def _ping():
+    return os.getpid()
+
+
+class InferencePool:
+    """
+    N inference worker processes, each with its own loaded model, behind a
+    bounded queue. submit() raises QueueFull instead of letting requests pile
+    up, so latency stays bounded under load. If a worker dies (OOM kill, native
+    crash) the executor is broken for good, so it is replaced and re-warmed.
+    """
+
+    def __init__(self, workers=EMOTION_WORKERS, queue_size=EMOTION_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._ready_counter = None
+        self._failed_counter = None
+        self._errors = None
+        self._warmup_errors = []
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "rejected": 0, "restarts": 0}
+
+    def start(self):
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._launch()
+        print(f"✅ Emotion inference pool starting {self.workers} workers (queue {self.queue_size})")
+
+    def _launch(self):
+        # TensorFlow is not fork-safe, so workers start from a fresh interpreter
+        context = multiprocessing.get_context("spawn")
+        self._ready_counter = context.Value("i", 0)
+        self._failed_counter = context.Value("i", 0)
+        self._errors = context.SimpleQueue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self._ready_counter, self._failed_counter, self._errors)
+        )
+        # Workers are spawned on demand; one ping each starts them all now
+        for _ in range(self.workers):
+            self._executor.submit(_ping)
+
+    def _restart(self, broken):
+        """Replaces a broken executor; a no-op if another thread already did."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._launch()
+            self._stats["restarts"] += 1
+        print("⚠️ Emotion inference pool lost a worker, restarted the pool")
+
+    def submit(self, blobs):
+        """Queues image bytes for a worker; the future resolves to (results, stage timings)."""
+        return self._submit(_analyze_in_worker, blobs)
+
+    def submit_burst(self, blobs):
+        """Queues a frame burst; the future resolves to (analyze_burst output, stage timings)."""
+        return self._submit(_analyze_burst_in_worker, blobs)
+
+    def _submit(self, task, blobs):
+        self.start()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise QueueFull()
+        executor = self._executor
+        try:
+            try:
+                future = executor.submit(task, blobs)
+            except BrokenProcessPool:
+                self._restart(executor)
+                executor = self._executor
+                future = executor.submit(task, blobs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda done: self._finished(executor, done))
+        with self._lock:
+            self._stats["submitted"] += 1
+        return future
+
+    def _finished(self, executor, future):
+        self._slots.release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._restart(executor)
+
+    def is_ready(self):
+        # One warm worker can serve; workers whose warmup failed retry on their next task
+        return self._ready_counter is not None and self._ready_counter.value > 0
+
+    def _drain_errors(self):
+        with self._lock:
+            while self._errors is not None and not self._errors.empty():
+                self._warmup_errors = (self._warmup_errors + [self._errors.get()])[-5:]
+            return list(self._warmup_errors)
+
+    def status(self):
+        warmup_errors = self._drain_errors()
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "ready": self.is_ready(),
+            "workers": self.workers,
+            "workers_ready": self._ready_counter.value if self._ready_counter is not None else 0,
+            "workers_failed": self._failed_counter.value if self._failed_counter is not None else 0,
+            "warmup_errors": warmup_errors,
+            "queue_size": self.queue_size,
+            **stats
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,86 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+
+# ✅ Load worker pool settings from the .env file
+load_dotenv()
+ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", "4"))
+ENRICHMENT_QUEUE_SIZE = int(os.getenv("ENRICHMENT_QUEUE_SIZE", "200"))
+ENRICHMENT_DRAIN_TIMEOUT = float(os.getenv("ENRICHMENT_DRAIN_TIMEOUT", "10"))
+
+
+class EnrichmentQueue:
+    """
+    Bounded pool of background workers that run feedback enrichment jobs
+    (sentiment, AI suggestion, notification) off the request path.
+    """
+
+    def __init__(self, workers=ENRICHMENT_WORKERS, maxsize=ENRICHMENT_QUEUE_SIZE):
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue = None
+        self._tasks = []
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def start(self):
+        """Create the queue and spawn the worker tasks on the running event loop."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"✅ Enrichment queue started with {self.workers} workers (max {self.maxsize} pending)")
+
+    async def stop(self):
+        """Give pending jobs a chance to finish, then cancel the workers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=ENRICHMENT_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Enrichment queue stopped with {self._queue.qsize()} jobs still pending")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job, *args):
+        """
+        Enqueue job(*args) without waiting. Returns False when the queue is not
+        running or already full, so the caller can fall back to running it inline.
+        """
+        if self._queue is None or not self._tasks:
+            return False
+        try:
+            self._queue.put_nowait((job, args))
+            return True
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+
+    def stats(self):
+        return {
+            "workers": len(self._tasks),
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_pending": self.maxsize,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    async def _worker(self, index):
+        while True:
+            job, args = await self._queue.get()
+            try:
+                if asyncio.iscoroutinefunction(job):
+                    await job(*args)
+                else:
+                    # Blocking jobs run in a thread so the event loop keeps serving requests
+                    await asyncio.to_thread(job, *args)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Enrichment worker {index} error: {e}")
+            finally:
+                self._queue.task_done()
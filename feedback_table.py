@@ -0,0 +1,114 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+TABLE_FIELDS = ["type", "content", "emotion", "rating", "category", "product", "sentiment", "timestamp"]
+DISPLAY_COLUMNS = ["Type", "Feedback", "Emotion", "Rating", "Category", "Product", "Sentiment"]
+
+# Index = whole stars; anything missing or outside 1-5 shows as N/A
+STAR_STRINGS = np.array(["N/A"] + ["⭐" * stars for stars in range(1, 6)], dtype=object)
+
+
+def _categorical(values, fill, normalize=None):
+    """
+    Builds a categorical column by working on the distinct values only: codes
+    come from one factorize pass, and normalize() runs once per distinct value
+    instead of once per row.
+    """
+    codes, uniques = pd.factorize(values)
+    labels = [normalize(value) if normalize else value for value in uniques]
+    categories = list(dict.fromkeys(labels + [fill]))
+    position = {label: i for i, label in enumerate(categories)}
+    remap = np.array([position[label] for label in labels] + [position[fill]], dtype=np.int64)
+    # factorize marks missing values with -1, which picks the trailing fill entry
+    return pd.Categorical.from_codes(remap[codes], categories)
+
+
+def _normalize_sentiment(value):
+    return str(value).strip().lower()
+
+
+def prepare_feedback_table(df):
+    """
+    Turns raw feedback rows into the dashboard table with column-at-a-time
+    operations: categorical Type/Emotion/Sentiment, star strings from a lookup
+    array, and a single datetime conversion. The input frame is not modified.
+    """
+    table = df.reindex(columns=TABLE_FIELDS)
+    feedback_type = table["type"].to_numpy()
+
+    ratings = pd.to_numeric(table["rating"], errors="coerce").to_numpy(dtype=float)
+    stars = np.where((ratings >= 1) & (ratings <= 5), np.nan_to_num(ratings), 0).astype(np.int64)
+
+    emotion = table["emotion"].to_numpy(dtype=object).copy()
+    emotion[feedback_type != "emotion"] = None
+
+    return pd.DataFrame({
+        "Type": _categorical(feedback_type, "unknown"),
+        "Feedback": table["content"].to_numpy(),
+        "Emotion": _categorical(emotion, "N/A"),
+        "Rating": STAR_STRINGS[stars],
+        "Category": table["category"].to_numpy(),
+        "Product": table["product"].to_numpy(),
+        "Sentiment": _categorical(table["sentiment"].to_numpy(), "unknown", _normalize_sentiment),
+        "Timestamp": pd.to_datetime(table["timestamp"], errors="coerce").to_numpy()
+    }, index=table.index)
+
+
+def _rowwise_table(df):
+    """The previous row-by-row implementation, kept as the benchmark baseline."""
+    feedback_table = df.copy()
+    feedback_table["timestamp"] = pd.to_datetime(feedback_table["timestamp"])
+    feedback_table["rating"] = feedback_table["rating"].apply(lambda x: "⭐" * int(x) if pd.notna(x) else "N/A")
+    feedback_table["emotion"] = feedback_table.apply(lambda row: row["emotion"] if row["type"] == "emotion" else "N/A", axis=1)
+    feedback_table["sentiment"] = feedback_table["sentiment"].fillna("unknown").astype(str).str.strip().str.lower()
+    return feedback_table
+
+
+def synthetic_feedback(rows, seed=0):
+    """Feedback-shaped rows with the same mix of types and missing fields as production data."""
+    rng = np.random.default_rng(seed)
+    feedback_type = rng.choice(["text", "voice", "emotion"], rows)
+    is_emotion = feedback_type == "emotion"
+    sentiment = rng.choice(["Positive", "Negative", "Neutral", " positive", None], rows)
+    return pd.DataFrame({
+        "type": feedback_type,
+        "content": np.where(is_emotion, None, "The tea was cold and the staff were slow"),
+        "emotion": np.where(is_emotion, rng.choice(["happy", "sad", "angry", "neutral", "surprise"], rows), None),
+        "rating": np.where(is_emotion, rng.integers(1, 6, rows), np.nan),
+        "category": rng.choice(["Food", "Drinks", "Service"], rows),
+        "product": rng.choice(["Tea", "Cake", "Coffee", "Sandwich"], rows),
+        "sentiment": np.where(is_emotion, None, sentiment),
+        "timestamp": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, rows), unit="s")
+    })
+
+
+def _time_per_row(fn, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best, best / len(df) * 1e6
+
+
+# ✅ python feedback_table.py                           -> per-row cost at 10k/100k/1M rows
+# ✅ python feedback_table.py --rows 50000 --rowwise-limit 0
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark the dashboard feedback table transforms")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many runs")
+    parser.add_argument("--rowwise-limit", type=int, default=100_000,
+                        help="largest size to also time the old row-wise version on (it is slow)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'vectorized':>14} {'µs/row':>8} {'row-wise':>12} {'µs/row':>8} {'speedup':>8}")
+    for rows in args.rows:
+        df = synthetic_feedback(rows)
+        fast, fast_per_row = _time_per_row(prepare_feedback_table, df, args.repeat)
+        line = f"{rows:>10} {fast:>13.3f}s {fast_per_row:>8.3f}"
+        if rows <= args.rowwise_limit:
+            slow, slow_per_row = _time_per_row(_rowwise_table, df, 1)
+            line += f" {slow:>11.3f}s {slow_per_row:>8.3f} {slow / fast:>7.1f}x"
+        print(line)
@@ -1,61 +1,221 @@
-import requests
-import os
-from dotenv import load_dotenv
+import re
+import json
+from gemini_client import generate_content, generate_content_async, extract_text
 
-# ✅ Load API key from .env file
-load_dotenv()
-GEMINI_API_KEY = os.getenv("REACT_APP_GEMINI_API_KEY")
+def _suggestion_prompt(feedback_text, category, product):
+    return f"""
+You are an expert business consultant helping a retail shop owner improve a specific product based on customer feedback.
+
+🎯 Customer Feedback: "{feedback_text}"
+📦 Product: {product}
+🏷️ Category: {category}
+
+✅ Task: Give 2–3 direct and **practical suggestions** for improving the **{product}** based on the above feedback.
+
+🔒 Rules:
+- DO NOT say the feedback is vague or unclear.
+- DO NOT make generic suggestions.
+- Each suggestion must be relevant to the product and feedback.
+- Format: 
+1. Suggestion: <text>
+   Why it helps: <brief reason>
+"""
+
+def _parse_suggestion(response_data):
+    text = extract_text(response_data)
+    return text if text is not None else "AI could not generate a valid suggestion."
+
+def is_fallback_suggestion(text):
+    """True for the placeholder texts returned when Gemini gave no usable suggestion."""
+    return text.startswith("AI could not generate")
 
 def get_ai_suggestion(feedback_text, category, product):
     """
     Sends customer feedback along with category and product info to Google Gemini AI
     and returns actionable suggestions for shop owners.
     """
+    try:
+        response_data = generate_content(_suggestion_prompt(feedback_text, category, product))
+        return _parse_suggestion(response_data)
+    except Exception as e:
+        print(f"❌ AI Suggestion Error: {e}")
+        return "AI could not generate suggestions."
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={GEMINI_API_KEY}"
+async def get_ai_suggestion_async(feedback_text, category, product):
+    """Non-blocking get_ai_suggestion for use inside async routes."""
+    try:
+        response_data = await generate_content_async(_suggestion_prompt(feedback_text, category, product))
+        return _parse_suggestion(response_data)
+    except Exception as e:
+        print(f"❌ AI Suggestion Error: {e}")
+        return "AI could not generate suggestions."
 
-    headers = {
-        "Content-Type": "application/json"
-    }
+SENTIMENT_LABELS = ("Positive", "Negative", "Neutral")
 
-    prompt = f"""
-You are an expert business consultant helping a retail shop owner improve a specific product based on customer feedback.
+# ✅ JSON schema Gemini must follow for the combined sentiment + suggestion call
+INSIGHTS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "sentiment": {"type": "STRING", "enum": list(SENTIMENT_LABELS)},
+        "confidence": {"type": "NUMBER"},
+        "suggestions": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "suggestion": {"type": "STRING"},
+                    "why": {"type": "STRING"}
+                },
+                "required": ["suggestion", "why"]
+            }
+        }
+    },
+    "required": ["sentiment", "confidence", "suggestions"]
+}
+
+def format_suggestions(suggestions):
+    """
+    Renders a suggestions list in the same numbered text format that
+    get_ai_suggestion produces, so stored documents look the same either way.
+    """
+    lines = []
+    for i, item in enumerate(suggestions, start=1):
+        lines.append(f"{i}. Suggestion: {item['suggestion']}")
+        if item.get("why"):
+            lines.append(f"   Why it helps: {item['why']}")
+    return "\n".join(lines)
+
+def _validate_insights(data):
+    """
+    Checks a decoded insights object against INSIGHTS_SCHEMA and normalizes it.
+    Returns None if it cannot be used.
+    """
+    if not isinstance(data, dict):
+        return None
+
+    sentiment = str(data.get("sentiment", "")).strip().capitalize()
+    if sentiment not in SENTIMENT_LABELS:
+        return None
+
+    # Only a real number is a model score; a missing or unusable one stays None
+    confidence = data.get("confidence")
+    if isinstance(confidence, (int, float)) and not isinstance(confidence, bool) and confidence == confidence:
+        confidence = min(max(float(confidence), 0.0), 1.0)
+    else:
+        confidence = None
+
+    suggestions = []
+    for item in data.get("suggestions") or []:
+        if isinstance(item, str) and item.strip():
+            suggestions.append({"suggestion": item.strip(), "why": ""})
+        elif isinstance(item, dict) and str(item.get("suggestion", "")).strip():
+            suggestions.append({
+                "suggestion": str(item["suggestion"]).strip(),
+                "why": str(item.get("why", "")).strip()
+            })
+    if not suggestions:
+        return None
+
+    return {"sentiment": sentiment, "confidence": confidence, "suggestions": suggestions}
+
+def parse_insights(text):
+    """
+    Parses Gemini's reply to the combined prompt. Tries strict JSON first, then a
+    JSON object embedded in prose or a code fence, and finally falls back to
+    scraping a sentiment word and numbered "Suggestion:" lines from plain text.
+    """
+    try:
+        insights = _validate_insights(json.loads(text))
+        if insights:
+            return insights
+    except ValueError:
+        pass
+
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match:
+        try:
+            insights = _validate_insights(json.loads(match.group(0)))
+            if insights:
+                return insights
+        except ValueError:
+            pass
+
+    sentiment = re.search(r"\b(positive|negative|neutral)\b", text, re.IGNORECASE)
+    suggestions = [
+        {"suggestion": s.strip(), "why": w.strip()}
+        for s, w in re.findall(r"Suggestion:\s*(.+?)(?:\n\s*Why it helps:\s*(.+?))?(?:\n|$)", text)
+    ]
+    if not sentiment or not suggestions:
+        return None
+    # Scraped answers have no model confidence; None keeps them apart from real scores
+    return {"sentiment": sentiment.group(1).capitalize(), "confidence": None, "suggestions": suggestions}
+
+def _insights_prompt(feedback_text, category, product):
+    return f"""
+You are an expert business consultant and sentiment analyst helping a retail shop owner.
 
 🎯 Customer Feedback: "{feedback_text}"
 📦 Product: {product}
 🏷️ Category: {category}
 
-✅ Task: Give 2–3 direct and **practical suggestions** for improving the **{product}** based on the above feedback.
+✅ Tasks:
+1. Classify the sentiment of the feedback as Positive, Negative or Neutral, with a confidence between 0 and 1.
+2. Give 2–3 direct and **practical suggestions** for improving the **{product}** based on the feedback.
 
 🔒 Rules:
 - DO NOT say the feedback is vague or unclear.
 - DO NOT make generic suggestions.
 - Each suggestion must be relevant to the product and feedback.
-- Format: 
-1. Suggestion: <text>
-   Why it helps: <brief reason>
+- Respond ONLY with JSON: {{"sentiment": "...", "confidence": 0.0, "suggestions": [{{"suggestion": "...", "why": "..."}}]}}
 """
 
-    data = {
-        "contents": [
-            {
-                "parts": [{"text": prompt}]
-            }
-        ]
+INSIGHTS_CONFIG = {
+    "responseMimeType": "application/json",
+    "responseSchema": INSIGHTS_SCHEMA
+}
+
+def _insights_fallback():
+    return {
+        "sentiment": "Unknown",
+        "confidence": None,
+        "suggestions": [],
+        "suggestion": "AI could not generate suggestions."
     }
 
-    try:
-        response = requests.post(url, json=data, headers=headers)
-        response_data = response.json()
+def _parse_insights_response(response_data):
+    text = extract_text(response_data)
+    if text is None:
+        return _insights_fallback()
 
-        if "candidates" in response_data:
-            return response_data["candidates"][0]["content"]["parts"][0]["text"]
-        else:
-            return "AI could not generate a valid suggestion."
+    insights = parse_insights(text)
+    if not insights:
+        print("❌ AI Insights Error: response did not match the expected schema")
+        return _insights_fallback()
 
+    insights["suggestion"] = format_suggestions(insights["suggestions"])
+    return insights
+
+def get_feedback_insights(feedback_text, category, product):
+    """
+    Asks Gemini once for both the sentiment and the improvement suggestions for a
+    piece of feedback. Returns a dict with sentiment, confidence, suggestions and
+    the rendered suggestion text; confidence is None when it is not a model score.
+    """
+    try:
+        response_data = generate_content(_insights_prompt(feedback_text, category, product), INSIGHTS_CONFIG)
+        return _parse_insights_response(response_data)
     except Exception as e:
-        print(f"❌ AI Suggestion Error: {e}")
-        return "AI could not generate suggestions."
+        print(f"❌ AI Insights Error: {e}")
+        return _insights_fallback()
+
+async def get_feedback_insights_async(feedback_text, category, product):
+    """Non-blocking get_feedback_insights for use inside async routes and workers."""
+    try:
+        response_data = await generate_content_async(_insights_prompt(feedback_text, category, product), INSIGHTS_CONFIG)
+        return _parse_insights_response(response_data)
+    except Exception as e:
+        print(f"❌ AI Insights Error: {e}")
+        return _insights_fallback()
 
 # ✅ Test this module independently
 if __name__ == "__main__":
@@ -64,3 +224,7 @@ if __name__ == "__main__":
     product = "Shampoo"
     suggestion = get_ai_suggestion(feedback, category, product)
     print("📢 AI Suggestion:\n", suggestion)
+    insights = get_feedback_insights(feedback, category, product)
+    confidence = insights["confidence"]
+    print("🧠 Sentiment:", insights["sentiment"], f"({confidence:.2f})" if confidence is not None else "(no model confidence)")
+    print("📢 AI Insights:\n", insights["suggestion"])
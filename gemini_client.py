@@ -0,0 +1,96 @@
+import asyncio
+import os
+import threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# ✅ Load API key and connection settings from the .env file
+load_dotenv()
+GEMINI_API_KEY = os.getenv("REACT_APP_GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "30"))
+GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "20"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "10"))
+
+GEMINI_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+
+# ✅ Sync side: one keep-alive session shared by every caller in the process
+_session = requests.Session()
+_session.headers.update({"Content-Type": "application/json"})
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=GEMINI_POOL_SIZE))
+_sync_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+
+# ✅ Async side: created lazily because both must belong to the running event loop
+_async_client = None
+_async_slots = None
+
+
+def build_request(prompt, generation_config=None):
+    """Builds the generateContent request body for a single text prompt."""
+    data = {
+        "contents": [
+            {
+                "parts": [{"text": prompt}]
+            }
+        ]
+    }
+    if generation_config:
+        data["generationConfig"] = generation_config
+    return data
+
+
+def extract_text(response_data):
+    """Returns the text of the first candidate, or None if Gemini gave no answer."""
+    if "candidates" in response_data:
+        return response_data["candidates"][0]["content"]["parts"][0]["text"]
+    return None
+
+
+def generate_content(prompt, generation_config=None):
+    """
+    Blocking generateContent call over the pooled session. Returns the decoded
+    JSON response; network errors and timeouts are raised to the caller.
+    """
+    with _sync_slots:
+        response = _session.post(
+            GEMINI_URL,
+            params={"key": GEMINI_API_KEY},
+            json=build_request(prompt, generation_config),
+            timeout=(GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT)
+        )
+    return response.json()
+
+
+def _get_async_client():
+    global _async_client, _async_slots
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            headers={"Content-Type": "application/json"},
+            timeout=httpx.Timeout(GEMINI_READ_TIMEOUT, connect=GEMINI_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=GEMINI_POOL_SIZE, max_keepalive_connections=GEMINI_POOL_SIZE)
+        )
+        _async_slots = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+    return _async_client
+
+
+async def generate_content_async(prompt, generation_config=None):
+    """Non-blocking version of generate_content for FastAPI routes and workers."""
+    client = _get_async_client()
+    async with _async_slots:
+        response = await client.post(
+            GEMINI_URL,
+            params={"key": GEMINI_API_KEY},
+            json=build_request(prompt, generation_config)
+        )
+    return response.json()
+
+
+async def aclose():
+    """Closes the async connection pool; call from the app's shutdown hook."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import os
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure, OperationFailure
+from dotenv import load_dotenv
+from sentiment import SENTIMENT_PRIORITY, UNKNOWN_PRIORITY
+
+# ✅ Index definitions for FeedbackDB: collection -> [(keys, options)]
+FEEDBACK_DB_INDEXES = {
+    "feedbacks": [
+        ([("timestamp", DESCENDING)], {"name": "timestamp_desc"}),
+        ([("type", ASCENDING), ("timestamp", DESCENDING)], {"name": "type_timestamp"}),
+        ([("sentiment", ASCENDING), ("timestamp", DESCENDING)], {"name": "sentiment_timestamp"}),
+        ([("product", ASCENDING), ("timestamp", DESCENDING)], {"name": "product_timestamp"}),
+        ([("category", ASCENDING), ("timestamp", DESCENDING)], {"name": "category_timestamp"}),
+        # Dashboard table pages sorted by priority, with and without a type filter
+        ([("priority", ASCENDING), ("timestamp", DESCENDING)], {"name": "priority_timestamp"}),
+        ([("type", ASCENDING), ("priority", ASCENDING), ("timestamp", DESCENDING)], {"name": "type_priority_timestamp"}),
+        # Latest enrichment, part of the dashboard's data version
+        ([("enriched_at", DESCENDING)], {"name": "enriched_at_desc"}),
+    ],
+    "feedback_categories": [
+        ([("name", ASCENDING)], {"name": "name_unique", "unique": True}),
+    ],
+    "Products": [
+        ([("name", ASCENDING)], {"name": "name_unique", "unique": True}),
+    ],
+}
+
+
+async def ensure_indexes(feedback_db):
+    """
+    Creates every index in FEEDBACK_DB_INDEXES on a Motor database. create_index
+    is a no-op for indexes that already exist, so this is safe to run on every
+    startup. A unique index that cannot be built because of existing duplicates
+    is reported and skipped instead of stopping the server, and so is an
+    unreachable Mongo. Returns the names of the collections whose unique index
+    is not in place, so callers can fall back to checking for duplicates themselves.
+    """
+    unenforced = set()
+    for collection_name, indexes in FEEDBACK_DB_INDEXES.items():
+        collection = feedback_db[collection_name]
+        for keys, options in indexes:
+            try:
+                await collection.create_index(keys, **options)
+            except ConnectionFailure as e:
+                print(f"❌ Could not reach MongoDB to create indexes: {e}")
+                return {name for name, specs in FEEDBACK_DB_INDEXES.items() if any(o.get("unique") for _, o in specs)}
+            except OperationFailure as e:
+                print(f"❌ Could not create index {collection_name}.{options['name']}: {e}")
+                if options.get("unique"):
+                    unenforced.add(collection_name)
+                    print(f"⚠️ Remove duplicate '{keys[0][0]}' values in {collection_name} and restart to enforce uniqueness")
+    print("✅ FeedbackDB indexes ensured")
+    return unenforced
+
+
+async def backfill_priority(feedbacks):
+    """
+    Stores the numeric priority on feedback written before the field existed,
+    from its sentiment. Only documents without a priority are touched, so this
+    is cheap to run on every startup. Returns the number of documents updated.
+    """
+    updated = 0
+    for label, priority in SENTIMENT_PRIORITY.items():
+        result = await feedbacks.update_many(
+            {"priority": {"$exists": False}, "sentiment": {"$regex": f"^\\s*{label}\\s*$", "$options": "i"}},
+            {"$set": {"priority": priority}}
+        )
+        updated += result.modified_count
+    result = await feedbacks.update_many({"priority": {"$exists": False}}, {"$set": {"priority": UNKNOWN_PRIORITY}})
+    updated += result.modified_count
+    if updated:
+        print(f"✅ Stored priority on {updated} older feedbacks")
+    return updated
+
+
+async def index_usage(feedback_db):
+    """Returns {collection: [{name, key, ops, since}]} from $indexStats."""
+    report = {}
+    for collection_name in FEEDBACK_DB_INDEXES:
+        stats = await feedback_db[collection_name].aggregate([{"$indexStats": {}}]).to_list(None)
+        report[collection_name] = sorted(
+            (
+                {
+                    "name": s["name"],
+                    "key": dict(s["key"]),
+                    "ops": s["accesses"]["ops"],
+                    "since": s["accesses"]["since"]
+                }
+                for s in stats
+            ),
+            key=lambda s: s["ops"],
+            reverse=True
+        )
+    return report
+
+
+async def _main(show_stats):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv()
+    client = AsyncIOMotorClient(os.getenv("MONGO_URI"))
+    feedback_db = client["FeedbackDB"]
+    try:
+        if show_stats:
+            for collection_name, stats in (await index_usage(feedback_db)).items():
+                print(f"\n📊 {collection_name}")
+                for s in stats:
+                    print(f"  {s['name']:<24} {s['ops']:>10} ops since {s['since']:%Y-%m-%d %H:%M}  {s['key']}")
+        else:
+            await ensure_indexes(feedback_db)
+            await backfill_priority(feedback_db["feedbacks"])
+    finally:
+        client.close()
+
+
+# ✅ python indexes.py          -> create indexes and backfill feedback priority
+# ✅ python indexes.py --stats  -> report how often each index has been used
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage FeedbackDB indexes")
+    parser.add_argument("--stats", action="store_true", help="report index usage from $indexStats")
+    args = parser.parse_args()
+    asyncio.run(_main(args.stats))
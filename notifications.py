@@ -0,0 +1,343 @@
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+import httpx
+from dotenv import load_dotenv
+from pymongo.errors import PyMongoError
+
+# ✅ Load Twilio and sender settings from the .env file
+load_dotenv()
+TWILIO_SID = os.getenv("TWILIO_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_WHATSAPP_NUMBER = os.getenv("TWILIO_WHATSAPP_NUMBER")  # e.g., 'whatsapp:+14155238886'
+# Point this at a local fake Twilio server to test without sending real messages
+TWILIO_API_BASE = os.getenv("TWILIO_API_BASE", "https://api.twilio.com")
+
+NOTIFY_RATE_PER_SEC = float(os.getenv("NOTIFY_RATE_PER_SEC", "1"))
+NOTIFY_BURST = int(os.getenv("NOTIFY_BURST", "5"))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+NOTIFY_BACKOFF_SECONDS = float(os.getenv("NOTIFY_BACKOFF_SECONDS", "2"))
+NOTIFY_POLL_SECONDS = float(os.getenv("NOTIFY_POLL_SECONDS", "2"))
+# A message left in "sending" longer than this belongs to a sender that died; it is queued again
+NOTIFY_CLAIM_TIMEOUT = float(os.getenv("NOTIFY_CLAIM_TIMEOUT", "300"))
+NOTIFY_RECIPIENT_TTL = float(os.getenv("NOTIFY_RECIPIENT_TTL", "300"))
+# Digest mode: coalesce up to N feedbacks, or whatever arrived within T seconds, into one message
+NOTIFY_DIGEST_SIZE = int(os.getenv("NOTIFY_DIGEST_SIZE", "1"))
+NOTIFY_DIGEST_SECONDS = float(os.getenv("NOTIFY_DIGEST_SECONDS", "60"))
+
+WHATSAPP_MAX_CHARS = 1600
+
+
+class TokenBucket:
+    """Allows `rate` sends per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate=NOTIFY_RATE_PER_SEC, capacity=NOTIFY_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def build_digest(messages):
+    """Joins several feedback notifications into one WhatsApp-sized message."""
+    if len(messages) == 1:
+        return messages[0][:WHATSAPP_MAX_CHARS]
+    body = f"📬 {len(messages)} new feedbacks:\n\n" + "\n\n".join(messages)
+    if len(body) > WHATSAPP_MAX_CHARS:
+        body = body[:WHATSAPP_MAX_CHARS - 1] + "…"
+    return body
+
+
+class NotificationOutbox:
+    """
+    Persistent outbox for shopkeeper WhatsApp notifications. Requests only insert
+    into the outbox collection; a background sender drains it with a cached
+    recipient, token-bucket rate limiting, retry with exponential backoff and an
+    optional digest mode.
+    """
+
+    def __init__(self, max_attempts=NOTIFY_MAX_ATTEMPTS, backoff_seconds=NOTIFY_BACKOFF_SECONDS,
+                 claim_timeout=NOTIFY_CLAIM_TIMEOUT):
+        self.outbox = None
+        self.shopkeepers = None
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.claim_timeout = claim_timeout
+        self.bucket = TokenBucket()
+        self._reclaimed_at = 0.0
+        self._recipient = None
+        self._recipient_checked = 0.0
+        self._task = None
+        self._wakeup = None
+        self._http = None
+        self._stats = {"sent": 0, "messages_sent": 0, "retried": 0, "failed": 0}
+
+    async def enqueue(self, message: str):
+        """Stores a notification for the background sender."""
+        now = datetime.utcnow()
+        await self.outbox.insert_one({
+            "message": message,
+            "status": "pending",
+            "attempts": 0,
+            "created_at": now,
+            "next_attempt_at": now
+        })
+        if self._wakeup is not None and NOTIFY_DIGEST_SIZE <= 1:
+            self._wakeup.set()
+
+    async def start(self, outbox_collection, shopkeeper_collection):
+        """Binds the (Motor) collections and starts the sender on the running event loop."""
+        if self._task is not None:
+            return
+        self.outbox = outbox_collection
+        self.shopkeepers = shopkeeper_collection
+        self._wakeup = asyncio.Event()
+        self._http = httpx.AsyncClient(timeout=httpx.Timeout(15, connect=5))
+        # Without Mongo the sender still starts; _drain_once reclaims once it is reachable
+        try:
+            await self._reclaim_expired()
+            await self.outbox.create_index([("status", 1), ("next_attempt_at", 1)])
+        except PyMongoError as e:
+            print(f"❌ Notification outbox setup skipped: {e}")
+        self._task = asyncio.create_task(self._run())
+        print(f"✅ Notification sender started (digest size {NOTIFY_DIGEST_SIZE}, {NOTIFY_RATE_PER_SEC}/s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self._http.aclose()
+
+    async def stats(self):
+        counts = {}
+        for status in ("pending", "sending", "sent", "failed"):
+            counts[status] = await self.outbox.count_documents({"status": status})
+        return {"outbox": counts, **self._stats, "digest_size": NOTIFY_DIGEST_SIZE}
+
+    async def _run(self):
+        while True:
+            try:
+                sent = await self._drain_once()
+            except Exception as e:
+                print(f"❌ Notification sender error: {e}")
+                sent = False
+            if not sent:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=NOTIFY_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _reclaim_expired(self):
+        """
+        Queues messages again whose claim lease ran out: their sender died mid-send.
+        Claims younger than claim_timeout may belong to another live server worker
+        and are left alone, so a restart does not send them twice.
+        """
+        self._reclaimed_at = time.monotonic()
+        expired = datetime.utcnow() - timedelta(seconds=self.claim_timeout)
+        result = await self.outbox.update_many(
+            {"status": "sending", "$or": [{"claimed_at": {"$lt": expired}}, {"claimed_at": {"$exists": False}}]},
+            {"$set": {"status": "pending"}, "$unset": {"claim": "", "claimed_at": ""}}
+        )
+        if result.modified_count:
+            print(f"⚠️ Requeued {result.modified_count} notifications left by a stopped sender")
+
+    async def _drain_once(self):
+        """Claims and sends one message or digest. Returns False when there was nothing to send."""
+        if time.monotonic() - self._reclaimed_at > self.claim_timeout / 2:
+            await self._reclaim_expired()
+        now = datetime.utcnow()
+        due = {"status": "pending", "next_attempt_at": {"$lte": now}}
+        batch_size = max(NOTIFY_DIGEST_SIZE, 1)
+        docs = await self.outbox.find(due, {"_id": 1, "created_at": 1}).sort("created_at", 1).limit(batch_size).to_list(batch_size)
+        if not docs:
+            return False
+
+        # In digest mode wait until the batch is full or its oldest entry is old enough
+        if batch_size > 1 and len(docs) < batch_size:
+            if (now - docs[0]["created_at"]).total_seconds() < NOTIFY_DIGEST_SECONDS:
+                return False
+
+        claim = uuid.uuid4().hex
+        await self.outbox.update_many(
+            {"_id": {"$in": [d["_id"] for d in docs]}, "status": "pending"},
+            {"$set": {"status": "sending", "claim": claim, "claimed_at": now}}
+        )
+        claimed = await self.outbox.find({"claim": claim}).sort("created_at", 1).to_list(None)
+        if not claimed:
+            return False
+
+        ids = [d["_id"] for d in claimed]
+        try:
+            to_number = await self._get_recipient()
+            if not to_number:
+                raise RuntimeError("No shopkeeper number found")
+            await self.bucket.acquire()
+            sid = await self._send(to_number, build_digest([d["message"] for d in claimed]))
+        except Exception as e:
+            await self._retry_later(claimed, str(e))
+            return True
+
+        await self.outbox.update_many(
+            {"_id": {"$in": ids}, "claim": claim},
+            {"$set": {"status": "sent", "sent_at": datetime.utcnow(), "twilio_sid": sid}, "$unset": {"claim": "", "claimed_at": ""}}
+        )
+        self._stats["sent"] += 1
+        self._stats["messages_sent"] += len(ids)
+        print(f"✅ WhatsApp message sent to {to_number} with SID: {sid} ({len(ids)} feedbacks)")
+        return True
+
+    async def _retry_later(self, docs, error):
+        for doc in docs:
+            attempts = doc.get("attempts", 0) + 1
+            if attempts >= self.max_attempts:
+                update = {"status": "failed", "attempts": attempts, "last_error": error}
+                self._stats["failed"] += 1
+            else:
+                delay = min(self.backoff_seconds * 2 ** (attempts - 1), 3600)
+                update = {
+                    "status": "pending",
+                    "attempts": attempts,
+                    "last_error": error,
+                    "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay)
+                }
+                self._stats["retried"] += 1
+            await self.outbox.update_one(
+                {"_id": doc["_id"], "claim": doc["claim"]},
+                {"$set": update, "$unset": {"claim": "", "claimed_at": ""}}
+            )
+        print(f"❌ WhatsApp message failed: {error}")
+
+    async def _get_recipient(self):
+        # The latest registered shopkeeper rarely changes, so only re-read it every NOTIFY_RECIPIENT_TTL seconds
+        if self._recipient and time.monotonic() - self._recipient_checked < NOTIFY_RECIPIENT_TTL:
+            return self._recipient
+        shopkeeper = await self.shopkeepers.find_one({}, sort=[("_id", -1)])
+        self._recipient = f"whatsapp:{shopkeeper['Phone_number']}" if shopkeeper and "Phone_number" in shopkeeper else None
+        self._recipient_checked = time.monotonic()
+        return self._recipient
+
+    async def _send(self, to_number, body):
+        response = await self._http.post(
+            f"{TWILIO_API_BASE}/2010-04-01/Accounts/{TWILIO_SID}/Messages.json",
+            auth=(TWILIO_SID or "", TWILIO_AUTH_TOKEN or ""),
+            data={"From": TWILIO_WHATSAPP_NUMBER, "To": to_number, "Body": body}
+        )
+        if response.status_code >= 400:
+            raise RuntimeError(f"Twilio returned {response.status_code}: {response.text[:200]}")
+        return response.json().get("sid")
+
+
+async def check_retry_backoff(feedback_db, failures=2, backoff_seconds=0.05):
+    """
+    Behaviour check for the send path against a fake Twilio endpoint (httpx
+    MockTransport) and scratch collections in feedback_db: the first `failures`
+    sends get a 503 and must be retried with doubling delays, the next one must
+    mark the message sent, and a message that never gets through must end up
+    failed after max_attempts. Returns a list of problems (empty on success).
+    """
+    requests_seen = []
+    outage = {"failures": failures}
+
+    def fake_twilio(request):
+        requests_seen.append(request)
+        if len(requests_seen) <= outage["failures"]:
+            return httpx.Response(503, text="fake outage")
+        return httpx.Response(201, json={"sid": f"SMcheck{len(requests_seen)}"})
+
+    outbox = feedback_db["notification_outbox_check"]
+    shopkeepers = feedback_db["notification_shopkeepers_check"]
+    await outbox.drop()
+    await shopkeepers.drop()
+    await shopkeepers.insert_one({"Phone_number": "+10000000000"})
+
+    sender = NotificationOutbox(max_attempts=failures + 2, backoff_seconds=backoff_seconds)
+    sender.outbox, sender.shopkeepers = outbox, shopkeepers
+    sender.bucket = TokenBucket(rate=1000, capacity=1000)
+    sender._http = httpx.AsyncClient(transport=httpx.MockTransport(fake_twilio))
+
+    problems = []
+    delays = []
+    try:
+        await sender.enqueue("check: retried message")
+        for _ in range(200):
+            await sender._drain_once()
+            doc = await outbox.find_one({})
+            if doc["status"] == "sent":
+                break
+            if doc["status"] == "pending" and doc["attempts"] > len(delays):
+                delays.append((doc["next_attempt_at"] - datetime.utcnow()).total_seconds())
+            await asyncio.sleep(backoff_seconds / 5)
+
+        if doc["status"] != "sent" or doc["attempts"] != failures:
+            problems.append(f"expected sent after {failures} failed attempts, got {doc['status']} after {doc['attempts']}")
+        if len(requests_seen) != failures + 1:
+            problems.append(f"expected {failures + 1} Twilio requests, got {len(requests_seen)}")
+        # Each retry waits about twice as long as the previous one (Mongo dates keep milliseconds)
+        for attempt, delay in enumerate(delays, start=1):
+            expected = backoff_seconds * 2 ** (attempt - 1)
+            if not expected - 0.02 <= delay <= expected + 0.002:
+                problems.append(f"retry {attempt} delayed {delay:.3f}s, expected about {expected:.3f}s")
+
+        # A message that never gets through is given up on after max_attempts
+        await outbox.delete_many({})
+        requests_seen.clear()
+        outage["failures"] = sender.max_attempts + 1
+        await sender.enqueue("check: failing message")
+        for _ in range(400):
+            await sender._drain_once()
+            doc = await outbox.find_one({})
+            if doc["status"] == "failed":
+                break
+            await asyncio.sleep(backoff_seconds / 5)
+        if doc["status"] != "failed" or doc["attempts"] != sender.max_attempts:
+            problems.append(f"expected failed after {sender.max_attempts} attempts, got {doc['status']} after {doc['attempts']}")
+    finally:
+        await sender._http.aclose()
+        await outbox.drop()
+        await shopkeepers.drop()
+    return problems
+
+
+async def _main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.getenv("MONGO_URI"))
+    try:
+        problems = await check_retry_backoff(client["FeedbackDB"])
+    finally:
+        client.close()
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ Notification retry, backoff and give-up behave as expected")
+    return 1 if problems else 0
+
+
+# ✅ python notifications.py --check  -> exercise retry/backoff against a fake Twilio endpoint
+#    (uses scratch collections in FeedbackDB and never contacts Twilio)
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="WhatsApp notification outbox tools")
+    parser.add_argument("--check", action="store_true", help="run the retry/backoff behaviour check")
+    args = parser.parse_args()
+    if not args.check:
+        parser.error("nothing to do, pass --check")
+    sys.exit(asyncio.run(_main()))
@@ -1,16 +1,24 @@
+import math
+from datetime import datetime, timezone
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from pymongo import MongoClient
-import os
+from pymongo.errors import DuplicateKeyError
 import requests
 from dotenv import load_dotenv
+from gemini_client import generate_content
+from dashboard_data import (
+    get_mongo_client, get_feedback_frame, data_version, load_overview, get_feedback_index, load_feedback_stats
+)
+from dashboard_charts import emotion_trend_chart, emotion_distribution_chart, feedback_type_chart
+from ral_retrieval import build_context
+from feedback_table import prepare_feedback_table, DISPLAY_COLUMNS
+from dashboard_queries import (
+    SORT_SEGMENTS, SUGGESTION_TYPES,
+    count_feedback, feedback_page, count_suggestions, suggestion_page
+)
 
 # ✅ Load environment variables
 load_dotenv()
-MONGO_URI = os.getenv("MONGO_URI")
-GEMINI_API_KEY = os.getenv("REACT_APP_GEMINI_API_KEY")
 
 # ✅ Streamlit Page Config
 st.set_page_config(page_title="Customer Feedback Dashboard", layout="wide", initial_sidebar_state="collapsed")
@@ -52,15 +60,21 @@ if st.button("Logout"):
     st.session_state.logged_in = False
     st.switch_page("login.py")
 
-# ✅ MongoDB Setup
-client = MongoClient(MONGO_URI)
+# ✅ MongoDB Setup (one cached client per process)
+client = get_mongo_client()
 db = client["FeedbackDB"]
 feedback_collection = db["feedbacks"]
+rollup_collection = db["feedback_rollups"]
 product_collection = db["Products"]
 
-# ✅ Fetch Feedback Data
-feedback_data = list(feedback_collection.find({}, {"_id": 0}))
-df = pd.DataFrame(feedback_data) if feedback_data else pd.DataFrame()
+# ✅ Metrics and charts come from the daily rollups, re-read only when the data version changes
+feedback_frame = get_feedback_frame()
+refresh_col, as_of_col = st.columns([1, 4])
+full_refresh = refresh_col.button("🔄 Refresh data")
+if full_refresh:
+    load_overview.clear()
+overview = load_overview(rollup_collection, feedback_collection, data_version(feedback_collection))
+as_of_col.caption(f"🕒 Data as of {datetime.now(timezone.utc):%Y-%m-%d %H:%M:%S} UTC · {overview['total']} feedbacks")
 
 # ✅ Custom CSS
 st.markdown("""
@@ -74,111 +88,77 @@ st.markdown("""
 
 st.markdown("<h2 style='text-align: center; font-size: 62px; padding-top: 40px;'>📊 Customer Feedback Dashboard</h2>", unsafe_allow_html=True)
 
-if not df.empty:
+if overview["total"]:
+    by_type = overview["by_type"]
+
     # ✅ Key Metrics
     st.markdown("### 📌 Key Metrics")
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric(label="Total Feedbacks", value=len(df))
-    col2.metric(label="Text Feedbacks", value=len(df[df["type"] == "text"]))
-    col3.metric(label="Voice Feedbacks", value=len(df[df["type"] == "voice"]))
-    col4.metric(label="Emotion Feedbacks", value=len(df[df["type"] == "emotion"]))
+    col1.metric(label="Total Feedbacks", value=overview["total"])
+    col2.metric(label="Text Feedbacks", value=int(by_type.get("text", 0)))
+    col3.metric(label="Voice Feedbacks", value=int(by_type.get("voice", 0)))
+    col4.metric(label="Emotion Feedbacks", value=int(by_type.get("emotion", 0)))
 
     # ✅ Emotion Trend
     st.markdown("<h2 style='font-size: 32px; font-style: italic'>📈 Emotion Trend Over Time</h2>", unsafe_allow_html=True)
-    if "timestamp" in df.columns and "emotion" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
-        df["date"] = df["timestamp"].dt.date
-        trend_df = df[df["type"] == "emotion"].groupby(["date", "emotion"]).size().unstack(fill_value=0)
-        fig, ax = plt.subplots(figsize=(10, 4))
-        trend_df.plot(ax=ax, marker="o")
-        ax.set_title("Daily Emotion Trends", fontsize=10)
-        ax.set_xlabel("Date", fontsize=8)
-        ax.set_ylabel("Count", fontsize=8)
-        ax.tick_params(axis='x', rotation=45, labelsize=6)
-        ax.tick_params(axis='y', labelsize=6)
-        st.pyplot(fig)
+    trend_df = overview["trend"]
+    if not trend_df.empty:
+        st.image(emotion_trend_chart(trend_df), use_container_width=True)
     else:
         st.info("Timestamp or emotion data not available for trend analysis.")
 
-    # ✅ Emotion Chart + Pie Chart
+    # ✅ Emotion Chart + Pie Chart (rendered once per distinct set of numbers)
     st.markdown("<h2 style='font-size: 32px; font-style: italic'>😊 Emotion Feedback Analysis</h2>", unsafe_allow_html=True)
     col1, col2 = st.columns([2, 1])
 
-    if "emotion" in df.columns:
-        emotion_order = ["happy", "sad", "surprise", "neutral", "angry"]
-        df["emotion"] = df["emotion"].fillna("Not Available")
-        emotion_counts = df["emotion"].value_counts().reindex(emotion_order, fill_value=0)
-        fig, ax = plt.subplots(figsize=(1.5, 0.5))
-        sns.barplot(x=emotion_counts.index, y=emotion_counts.values, hue=emotion_counts.index, ax=ax, palette="coolwarm", legend=False)
-        ax.tick_params(axis="x", labelsize=3)
-        ax.tick_params(axis="y", labelsize=3)
-        ax.set_xlabel("-----> Emotion", fontsize=2)
-        ax.set_ylabel("-----> Count", fontsize=2)
-        ax.set_title("Emotion Distribution", fontsize=4)
-        col1.pyplot(fig)
-
-    feedback_counts = df["type"].value_counts()
-    fig, ax = plt.subplots(figsize=(1, 1))
-    ax.pie(feedback_counts, labels=feedback_counts.index, autopct="%1.1f%%", colors=sns.color_palette("pastel"), textprops={"fontsize": 3})
-    col2.pyplot(fig)
-
-    # ✅ Feedback Table    
-    
+    if by_type.get("emotion", 0):
+        col1.image(emotion_distribution_chart(overview["emotions"]), use_container_width=True)
 
-    # Feedback type filter
-    feedback_types = ["All"] + df["type"].unique().tolist()
-    selected_feedback_type = st.selectbox("Select Feedback Type:", feedback_types, key="feedback_type")
-    
-    sort_options = ["Newest First", "Oldest First", "Most Priority First (Negative Sentiment)", "Least Priority First (Positive Sentiment)"]
-    selected_sort = st.selectbox("Sort Feedbacks By:", sort_options, key="sort_option")
-
-    filtered_feedback = df if selected_feedback_type == "All" else df[df["type"] == selected_feedback_type]
-
-    feedback_table = filtered_feedback.copy()
-    feedback_table["timestamp"] = pd.to_datetime(feedback_table["timestamp"])
-    feedback_table["rating"] = feedback_table["rating"].apply(lambda x: "⭐" * int(x) if pd.notna(x) else "N/A")
-    feedback_table["emotion"] = feedback_table.apply(lambda row: row["emotion"] if row["type"] == "emotion" else "N/A", axis=1)
-    feedback_table["category"] = feedback_table.get("category", "N/A")
-    feedback_table["product"] = feedback_table.get("product", "N/A")
-    feedback_table["sentiment"] = feedback_table.get("sentiment", "N/A").fillna("unknown").astype(str).str.strip().str.lower()
-
-    if selected_sort == "Newest First":
-        feedback_table = feedback_table.sort_values(by="timestamp", ascending=False)
-    elif selected_sort == "Oldest First":
-        feedback_table = feedback_table.sort_values(by="timestamp", ascending=True)
-    elif selected_sort == "Most Priority First (Negative Sentiment)":
-        sentiment_priority = {"negative": 0, "neutral": 1, "positive": 2}
-        feedback_table["priority"] = feedback_table["sentiment"].map(sentiment_priority).fillna(3)
-        feedback_table = feedback_table.sort_values(by="priority")
-    elif selected_sort == "Least Priority First (Positive Sentiment)":
-        sentiment_priority = {"positive": 0, "neutral": 1, "negative": 2}
-        feedback_table["priority"] = feedback_table["sentiment"].map(sentiment_priority).fillna(3)
-        feedback_table = feedback_table.sort_values(by="priority")
-
-    feedback_table = feedback_table.rename(columns={
-        "content": "Feedback", "type": "Type", "rating": "Rating", "emotion": "Emotion",
-        "category": "Category", "product": "Product", "sentiment": "Sentiment"
-    })
-
-    display_cols = ["Type", "Feedback", "Emotion", "Rating", "Category", "Product", "Sentiment"]
-    st.dataframe(feedback_table[display_cols], use_container_width=True)
+    col2.image(feedback_type_chart(by_type), use_container_width=True)
+
+    # ✅ Feedback Table: one page at a time, filtered and sorted in Mongo
+
+    def back_to_first_page():
+        st.session_state.page = 1
 
+    # Feedback type filter
+    feedback_types = ["All"] + by_type.index.tolist()
+    selected_feedback_type = st.selectbox("Select Feedback Type:", feedback_types, key="feedback_type", on_change=back_to_first_page)
     
-    # ✅ AI Suggestions
-    st.markdown("<h2 style='font-size: 32px; font-style: italic'>🤖 AI Suggestions</h2>", unsafe_allow_html=True)
-    suggestion_types = ["All"] + df[df["type"].isin(["text", "voice"])]["type"].unique().tolist()
-    selected_suggestion_type = st.selectbox("Select AI Suggestion Type:", suggestion_types, key="ai_type")
+    sort_options = list(SORT_SEGMENTS)
+    selected_sort = st.selectbox("Sort Feedbacks By:", sort_options, key="sort_option", on_change=back_to_first_page)
 
-    ai_filtered = df[(df["type"].isin(["text", "voice"])) & df["suggestion"].notna()]
-    if selected_suggestion_type != "All":
-        ai_filtered = ai_filtered[ai_filtered["type"] == selected_suggestion_type]
+    total_rows = count_feedback(feedback_collection, selected_feedback_type)
+    size_col, page_col, info_col = st.columns([1, 1, 2])
+    page_size = size_col.selectbox("Rows per page:", [25, 50, 100], key="page_size", on_change=back_to_first_page)
+    page_count = max(1, math.ceil(total_rows / page_size))
+    page = page_col.number_input("Page:", min_value=1, max_value=page_count, step=1, key="page")
+    info_col.caption(f"Page {page} of {page_count} · {total_rows} feedbacks")
 
-    ai_table = ai_filtered.rename(columns={"content": "Feedback", "type": "Type", "suggestion": "AI Suggestion"})
-    ai_table = ai_table[["Type", "Feedback", "AI Suggestion"]]
+    page_docs = feedback_page(feedback_collection, selected_feedback_type, selected_sort, page, page_size)
+    feedback_table = prepare_feedback_table(pd.DataFrame(page_docs))
+    st.dataframe(feedback_table[DISPLAY_COLUMNS], use_container_width=True)
 
-    for idx, row in ai_table.iterrows():
-        with st.expander(f"**{idx+1}. Type:** {row['Type'].capitalize()} - 💬 {row['Feedback']}"):
-            st.success(f"🤖 {row['AI Suggestion']}")
+    
+    # ✅ AI Suggestions: expanders are built only for the page being viewed
+    st.markdown("<h2 style='font-size: 32px; font-style: italic'>🤖 AI Suggestions</h2>", unsafe_allow_html=True)
+    suggestion_types = ["All"] + [t for t in SUGGESTION_TYPES if by_type.get(t, 0)]
+    selected_suggestion_type = st.selectbox(
+        "Select AI Suggestion Type:", suggestion_types, key="ai_type", on_change=lambda: st.session_state.update(ai_page=1)
+    )
+
+    suggestions_per_page = 10
+    suggestion_total = count_suggestions(feedback_collection, selected_suggestion_type)
+    suggestion_pages = max(1, math.ceil(suggestion_total / suggestions_per_page))
+    suggestion_page_number = st.number_input(
+        f"Suggestions page (of {suggestion_pages}):", min_value=1, max_value=suggestion_pages, step=1, key="ai_page"
+    )
+
+    first_number = (suggestion_page_number - 1) * suggestions_per_page
+    ai_rows = suggestion_page(feedback_collection, selected_suggestion_type, suggestion_page_number, suggestions_per_page)
+    for idx, row in enumerate(ai_rows, start=first_number):
+        with st.expander(f"**{idx+1}. Type:** {row['type'].capitalize()} - 💬 {row.get('content', '')}"):
+            st.success(f"🤖 {row['suggestion']}")
 
     # ✅ Ask RAL
     st.markdown("---")
@@ -187,31 +167,33 @@ if not df.empty:
 
     if question:
         with st.spinner("RAL is analyzing your data..."):
-            df_copy = df.copy()
-            df_copy["suggestion"] = df_copy["suggestion"].fillna("No suggestion")
-            feedback_context = "\n".join(
-                f"Type: {row['type']}, Feedback: {row['content']}, Suggestion: {row['suggestion']} , Category: {row['category']} , Product:{row['product']} , TimeStamp:{row['timestamp']}"
-                for _, row in df_copy.iterrows()
+            # Feedback documents are only loaded here: once in full, then newer than the watermark
+            df, _ = feedback_frame.sync(feedback_collection, full=full_refresh)
+            # Only the feedback relevant to the question, plus summaries, within the token budget
+            feedback_index = get_feedback_index()
+            feedback_index.sync(df, feedback_frame.version())
+            feedback_context, context_details = build_context(
+                question, df, feedback_index, load_feedback_stats(df, feedback_frame.version())
             )
             full_prompt = f"""
-            You are 'RAL' – an expert AI advisor for shopkeepers. Your job is to help the shopkeeper by answering their questions using the customer feedback , existing AI suggestions for them , product , category  provided below. 
+            You are 'RAL' – an expert AI advisor for shopkeepers. Your job is to help the shopkeeper by answering their questions using the customer feedback , existing AI suggestions for them , product , category  provided below. The feedback shown is the most relevant subset; the summaries cover all feedback. 
             {feedback_context}
             Based on this, answer the shopkeeper's question:
             {question}
             """
             def get_ai_insight_from_feedback(user_prompt):
-                url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={GEMINI_API_KEY}"
-                headers = {"Content-Type": "application/json"}
-                data = {"contents": [{"parts": [{"text": user_prompt}]}]}
                 try:
-                    response = requests.post(url, json=data, headers=headers)
-                    result = response.json()
+                    result = generate_content(user_prompt)
                     return result["candidates"][0]["content"]["parts"][0]["text"]
                 except Exception as e:
                     return f"Error from Gemini: {e}"
 
             ai_response = get_ai_insight_from_feedback(full_prompt)
             st.success(ai_response)
+            st.caption(
+                f"Based on {context_details['feedbacks']} relevant feedbacks and "
+                f"{context_details['summaries']} product/category summaries (~{context_details['tokens']} tokens)"
+            )
 else:
     st.warning("No feedback data found.")
 
@@ -302,13 +284,15 @@ with st.form("add_product_form"):
             st.warning("Please enter a valid product name.")
         elif p_price <= 0:
             st.warning("Please enter a valid price greater than ₹0.")
+        # Fallback for when the unique name index could not be built (see indexes.py)
+        elif product_collection.find_one({"name": p_name.strip()}, {"_id": 1}):
+            st.warning("Product already exists.")
         else:
             try:
-                if product_collection.find_one({"name": p_name.strip()}):
-                    st.warning("Product already exists.")
-                else:
-                    product_collection.insert_one({"name": p_name.strip(), "price": p_price})
-                    st.success(f"✅ Product '{p_name}' added with price ₹{p_price:.2f}!")
+                product_collection.insert_one({"name": p_name.strip(), "price": p_price})
+                st.success(f"✅ Product '{p_name}' added with price ₹{p_price:.2f}!")
+            except DuplicateKeyError:
+                st.warning("Product already exists.")
             except Exception as e:
                 st.error(f"Failed to add product: {e}")
 
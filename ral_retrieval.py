@@ -0,0 +1,238 @@
+import math
+import os
+import re
+import threading
+from collections import Counter
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+# ✅ Load Ask RAL retrieval settings from the .env file
+load_dotenv()
+RAL_TOP_K = int(os.getenv("RAL_TOP_K", "40"))
+# Rough prompt size limit for the assembled context (about 4 characters per token)
+RAL_CONTEXT_TOKENS = int(os.getenv("RAL_CONTEXT_TOKENS", "3000"))
+CHARS_PER_TOKEN = 4
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "for", "with", "about",
+    "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "these", "those",
+    "i", "me", "my", "we", "our", "you", "your", "they", "them", "their", "he", "she",
+    "what", "which", "who", "how", "why", "when", "where", "do", "does", "did", "have", "has",
+    "most", "more", "any", "all", "some", "can", "could", "should", "would", "from", "by", "as",
+    "customers", "customer", "feedback", "feedbacks", "people", "saying", "say", "tell",
+}
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(str(text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class FeedbackIndex:
+    """
+    In-memory TF-IDF index (BM25 weighting) over feedback content. Each term
+    keeps a postings list of (document, count) that is turned into NumPy
+    arrays for scoring, so a query touches only the documents sharing a term
+    with it. New feedback is appended without rebuilding anything.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.version = None
+        self._ids = []
+        self._known = set()
+        self._lengths = []
+        self._length_array = None
+        self._postings = {}  # term -> ([document positions], [term counts])
+        self._arrays = {}    # term -> (positions, counts) as arrays, rebuilt after appends
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def sync(self, df, version):
+        """Indexes feedback rows (with _id and content) not seen before; a no-op if version is unchanged."""
+        with self._lock:
+            if version == self.version or df.empty or "content" not in df.columns:
+                self.version = version
+                return 0
+            new_rows = df[~df["_id"].isin(list(self._known))] if self._known else df
+            added = 0
+            for doc_id, content in zip(new_rows["_id"], new_rows["content"]):
+                if isinstance(content, str) and content.strip():
+                    self._add(doc_id, content)
+                    added += 1
+            self.version = version
+            return added
+
+    def _add(self, doc_id, text):
+        terms = Counter(tokenize(text))
+        position = len(self._ids)
+        self._ids.append(doc_id)
+        self._known.add(doc_id)
+        self._lengths.append(sum(terms.values()))
+        self._length_array = None
+        for term, count in terms.items():
+            positions, counts = self._postings.setdefault(term, ([], []))
+            positions.append(position)
+            counts.append(count)
+            self._arrays.pop(term, None)
+
+    def _term_arrays(self, term):
+        arrays = self._arrays.get(term)
+        if arrays is None and term in self._postings:
+            positions, counts = self._postings[term]
+            arrays = (np.asarray(positions, dtype=np.int64), np.asarray(counts, dtype=np.float64))
+            self._arrays[term] = arrays
+        return arrays
+
+    def search(self, query, k=RAL_TOP_K):
+        """Returns [(feedback _id, score)] for the k best matches, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._ids)
+            if not n or not terms:
+                return []
+            if self._length_array is None:
+                self._length_array = np.asarray(self._lengths, dtype=np.float64)
+            lengths = self._length_array
+            average_length = max(lengths.mean(), 1.0)
+
+            scores = np.zeros(n)
+            for term in terms:
+                arrays = self._term_arrays(term)
+                if arrays is None:
+                    continue
+                positions, counts = arrays
+                idf = math.log(1 + (n - len(positions) + 0.5) / (len(positions) + 0.5))
+                saturation = counts + self.k1 * (1 - self.b + self.b * lengths[positions] / average_length)
+                scores[positions] += idf * counts * (self.k1 + 1) / saturation
+
+            hits = np.flatnonzero(scores)
+            if len(hits) > k:
+                hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+            hits = hits[np.argsort(-scores[hits], kind="stable")]
+            return [(self._ids[i], float(scores[i])) for i in hits]
+
+
+def feedback_stats(df):
+    """
+    Per-product and per-category summaries computed once per data version:
+    feedback count, sentiment mix, average rating and most common emotion.
+    Returns {"product": DataFrame, "category": DataFrame}.
+    """
+    frame = df.reindex(columns=["product", "category", "sentiment", "rating", "emotion"])
+    sentiment = frame["sentiment"].astype("string").str.strip().str.lower()
+    rating = pd.to_numeric(frame["rating"], errors="coerce")
+
+    stats = {}
+    for key in ("product", "category"):
+        groups = frame[key]
+        summary = pd.DataFrame({"feedbacks": groups.value_counts()})
+        mix = pd.crosstab(groups, sentiment)
+        for label in ("negative", "neutral", "positive"):
+            summary[label] = mix[label] if label in mix.columns else 0
+        summary["avg_rating"] = rating.groupby(groups).mean()
+        emotions = pd.crosstab(groups, frame["emotion"])
+        summary["top_emotion"] = emotions.idxmax(axis=1) if not emotions.empty else None
+        stats[key] = summary.fillna({"negative": 0, "neutral": 0, "positive": 0})
+    return stats
+
+
+def _stat_line(kind, name, row):
+    line = (
+        f"{kind} {name}: {int(row['feedbacks'])} feedbacks "
+        f"({int(row['negative'])} negative, {int(row['neutral'])} neutral, {int(row['positive'])} positive)"
+    )
+    if pd.notna(row["avg_rating"]):
+        line += f", avg rating {row['avg_rating']:.1f}"
+    if isinstance(row["top_emotion"], str):
+        line += f", most common emotion {row['top_emotion']}"
+    return line
+
+
+def _feedback_line(row):
+    suggestion = row.get("suggestion")
+    return (
+        f"Type: {row.get('type')}, Feedback: {row.get('content')}, "
+        f"Suggestion: {suggestion if isinstance(suggestion, str) else 'No suggestion'}, "
+        f"Category: {row.get('category')}, Product: {row.get('product')}, "
+        f"Sentiment: {row.get('sentiment')}, TimeStamp: {row.get('timestamp')}"
+    )
+
+
+def build_context(question, df, index, stats, top_k=RAL_TOP_K, token_budget=RAL_CONTEXT_TOKENS):
+    """
+    Assembles the Ask RAL context: summaries for the products and categories
+    the question or the retrieved feedback mention, then the top_k most
+    relevant feedbacks (the newest ones if nothing matches, repeats skipped),
+    cut off at token_budget. Returns (context, details).
+    """
+    # Over-fetch so skipping repeated texts still leaves top_k distinct feedbacks
+    hits = index.search(question, top_k * 4)
+    if hits:
+        rank = {doc_id: i for i, (doc_id, _) in enumerate(hits)}
+        rows = df[df["_id"].isin(list(rank))]
+        rows = rows.iloc[np.argsort(rows["_id"].map(rank).to_numpy(), kind="stable")]
+    else:
+        rows = df.sort_values("timestamp", ascending=False).head(top_k * 4) if "timestamp" in df.columns else df.head(top_k * 4)
+
+    lowered = question.lower()
+    stat_lines = []
+    for kind, key in (("Product", "product"), ("Category", "category")):
+        summary = stats[key]
+        mentioned = [name for name in summary.index if str(name).lower() in lowered]
+        retrieved = rows[key].dropna().unique().tolist() if key in rows.columns else []
+        for name in dict.fromkeys(mentioned + retrieved):
+            if name in summary.index:
+                stat_lines.append(_stat_line(kind, name, summary.loc[name]))
+
+    sections = []
+    used_tokens = 0
+
+    def fits(line, budget=token_budget):
+        nonlocal used_tokens
+        cost = estimate_tokens(line) + 1
+        if used_tokens + cost > budget:
+            return False
+        sections.append(line)
+        used_tokens += cost
+        return True
+
+    fits(f"Overall: {len(df)} feedbacks in total.")
+    fits("Summaries:")
+    summaries_used = 0
+    # Summaries may use at most half the budget so feedback text always gets room
+    for line in stat_lines:
+        if not fits(line, token_budget // 2):
+            break
+        summaries_used += 1
+
+    fits("Most relevant feedback:")
+    feedback_used = 0
+    seen = set()
+    for row in rows.to_dict("records"):
+        if feedback_used == top_k:
+            break
+        # Repeated identical feedback adds cost but no information
+        text = " ".join(tokenize(row.get("content")))
+        if text in seen:
+            continue
+        seen.add(text)
+        if not fits(_feedback_line(row)):
+            break
+        feedback_used += 1
+
+    details = {
+        "matched": len(hits),
+        "feedbacks": feedback_used,
+        "summaries": summaries_used,
+        "tokens": used_tokens
+    }
+    return "\n".join(sections), details
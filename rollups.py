@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import os
+import re
+from collections import defaultdict
+from datetime import datetime
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from sentiment import SENTIMENT_PRIORITY
+
+# ✅ Daily feedback rollups: one document per (date, type, product, category)
+# {_id: {date, type, product, category}, count, emotions: {happy: n, ...},
+#  sentiments: {negative: n, neutral: n, positive: n, unknown: n}, rating_sum, rating_count}
+ROLLUP_COLLECTION = "feedback_rollups"
+# Written by rebuild_rollups; readers only trust the rollups once it exists,
+# since live writes alone would only cover feedback stored after deploy
+ROLLUP_MARKER_ID = "rebuilt"
+
+_LABEL_RE = re.compile(r"[^a-z_]")
+
+
+def _label(value):
+    """Emotion/sentiment values become field names, so keep them to plain lowercase words."""
+    return _LABEL_RE.sub("", str(value).strip().lower()) or "other"
+
+
+def sentiment_bucket(sentiment):
+    label = str(sentiment or "").strip().lower()
+    return label if label in SENTIMENT_PRIORITY else "unknown"
+
+
+def rollup_key(doc):
+    timestamp = doc.get("timestamp")
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    return {
+        "date": timestamp.strftime("%Y-%m-%d") if timestamp else None,
+        "type": doc.get("type"),
+        "product": doc.get("product"),
+        "category": doc.get("category")
+    }
+
+
+def _key_tuple(key):
+    return key["date"], key["type"], key["product"], key["category"]
+
+
+def insert_increments(doc):
+    """The $inc a newly stored feedback document contributes to its rollup."""
+    inc = {"count": 1, f"sentiments.{sentiment_bucket(doc.get('sentiment'))}": 1}
+    if doc.get("emotion"):
+        inc[f"emotions.{_label(doc['emotion'])}"] = 1
+    rating = doc.get("rating")
+    if isinstance(rating, (int, float)):
+        inc["rating_sum"] = rating
+        inc["rating_count"] = 1
+    return inc
+
+
+def sentiment_increments(previous_sentiment, sentiment):
+    """Moves one feedback between sentiment buckets after late enrichment; empty if unchanged."""
+    before, after = sentiment_bucket(previous_sentiment), sentiment_bucket(sentiment)
+    if before == after:
+        return {}
+    return {f"sentiments.{before}": -1, f"sentiments.{after}": 1}
+
+
+def _merged_ops(pairs):
+    """Folds (key, increments) pairs into one upsert per rollup document."""
+    keys = {}
+    totals = defaultdict(lambda: defaultdict(int))
+    for key, inc in pairs:
+        if not inc:
+            continue
+        k = _key_tuple(key)
+        keys[k] = key
+        for field, amount in inc.items():
+            totals[k][field] += amount
+    return [UpdateOne({"_id": keys[k]}, {"$inc": dict(inc)}, upsert=True) for k, inc in totals.items()]
+
+
+async def apply_rollups(rollups, pairs):
+    """
+    Applies (rollup key, increments) pairs with one unordered bulk write.
+    Rollups are derived data, so a failure is logged rather than failing the
+    feedback write; `python rollups.py --rebuild` repairs any drift.
+    """
+    ops = _merged_ops(pairs)
+    if not ops:
+        return
+    try:
+        await rollups.bulk_write(ops, ordered=False)
+    except Exception as e:
+        print(f"❌ Feedback rollup update failed: {e}")
+
+
+async def record_inserts(rollups, docs):
+    await apply_rollups(rollups, [(rollup_key(doc), insert_increments(doc)) for doc in docs])
+
+
+async def record_enrichments(rollups, changes):
+    """changes: (stored document before enrichment, new sentiment) pairs."""
+    await apply_rollups(rollups, [
+        (rollup_key(doc), sentiment_increments(doc.get("sentiment"), sentiment))
+        for doc, sentiment in changes
+    ])
+
+
+# Same day bucketing as the live writes; older documents may hold ISO string timestamps
+_REBUILD_PIPELINE = [
+    {"$group": {
+        "_id": {
+            "date": {"$dateToString": {
+                "format": "%Y-%m-%d",
+                "date": {"$convert": {"input": "$timestamp", "to": "date", "onError": None, "onNull": None}}
+            }},
+            "type": "$type",
+            "product": "$product",
+            "category": "$category",
+            "emotion": "$emotion",
+            "sentiment": {"$toLower": {"$trim": {"input": {"$ifNull": [{"$toString": "$sentiment"}, ""]}}}}
+        },
+        "count": {"$sum": 1},
+        "rating_sum": {"$sum": {"$cond": [{"$isNumber": "$rating"}, "$rating", 0]}},
+        "rating_count": {"$sum": {"$cond": [{"$isNumber": "$rating"}, 1, 0]}}
+    }}
+]
+
+
+def _rebuild_increments(rows):
+    pairs = []
+    for row in rows:
+        group = row["_id"]
+        key = {field: group.get(field) for field in ("date", "type", "product", "category")}
+        inc = {"count": row["count"], f"sentiments.{sentiment_bucket(group.get('sentiment'))}": row["count"]}
+        if group.get("emotion"):
+            inc[f"emotions.{_label(group['emotion'])}"] = row["count"]
+        if row["rating_count"]:
+            inc["rating_sum"] = row["rating_sum"]
+            inc["rating_count"] = row["rating_count"]
+        pairs.append((key, inc))
+    return pairs
+
+
+async def _newest_feedback_id(feedbacks):
+    newest = await feedbacks.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    return newest["_id"] if newest else None
+
+
+async def rebuild_rollups(feedback_db):
+    """
+    Recomputes every rollup from the raw feedbacks into a scratch collection
+    and swaps it in with one rename, together with the ROLLUP_MARKER_ID
+    document. Feedback stored while the rebuild ran only incremented the old
+    collection, and so did enrichment of feedback that was still pending, so
+    both are left out of the aggregation and replayed into the new collection
+    from their current state afterwards. Returns the number of rollup documents built.
+    """
+    feedbacks = feedback_db["feedbacks"]
+    rollups = feedback_db[ROLLUP_COLLECTION]
+    started_at = datetime.utcnow()
+    through_id = await _newest_feedback_id(feedbacks)
+    pending_query = {"enrichment_status": "pending"}
+    if through_id:
+        pending_query["_id"] = {"$lte": through_id}
+    pending_ids = [doc["_id"] for doc in await feedbacks.find(pending_query, {"_id": 1}).to_list(None)]
+    match = {"_id": {"$lte": through_id, "$nin": pending_ids}} if through_id else {}
+    rows = await feedbacks.aggregate([{"$match": match}] + _REBUILD_PIPELINE, allowDiskUse=True).to_list(None)
+
+    scratch = feedback_db[f"{ROLLUP_COLLECTION}_rebuild"]
+    await scratch.drop()
+    ops = _merged_ops(_rebuild_increments(rows))
+    if ops:
+        await scratch.bulk_write(ops, ordered=False)
+    await scratch.insert_one({"_id": ROLLUP_MARKER_ID, "rebuilt_at": started_at, "through_id": through_id})
+    await scratch.rename(ROLLUP_COLLECTION, dropTarget=True)
+
+    # Writes and enrichments from here on increment the new collection themselves;
+    # one landing in the instant of the swap may still be off by one until the next rebuild
+    replay_query = {"$or": [{"_id": {"$gt": through_id}}, {"_id": {"$in": pending_ids}}]} if through_id else {}
+    replayed = await feedbacks.find(replay_query).to_list(None)
+    await record_inserts(rollups, replayed)
+
+    print(
+        f"✅ Rebuilt {len(ops)} feedback rollups from {sum(row['count'] for row in rows)} feedbacks"
+        f" (+{len(replayed)} pending or written during the rebuild)"
+    )
+    return len(ops)
+
+
+async def rollups_built(rollups):
+    return await rollups.find_one({"_id": ROLLUP_MARKER_ID}, {"_id": 1}) is not None
+
+
+async def _main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv()
+    client = AsyncIOMotorClient(os.getenv("MONGO_URI"))
+    try:
+        await rebuild_rollups(client["FeedbackDB"])
+    finally:
+        client.close()
+
+
+# ✅ python rollups.py --rebuild  -> backfill feedback_rollups from the raw feedbacks
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the feedback_rollups collection")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every rollup from the feedbacks collection")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("nothing to do, pass --rebuild")
+    asyncio.run(_main())
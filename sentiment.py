@@ -1,50 +1,195 @@
-import requests
 import os
+import re
+import json
+import math
+import threading
 from dotenv import load_dotenv
+from gemini_client import generate_content, generate_content_async, extract_text
 
-# ✅ Load the Gemini API key from the .env file
+# ✅ Load sentiment engine settings from the .env file
 load_dotenv()
-GEMINI_API_KEY = os.getenv("REACT_APP_GEMINI_API_KEY")
+# "local" = lexicon only, "hybrid" = lexicon with Gemini for unsure texts, "remote" = Gemini only
+SENTIMENT_MODE = os.getenv("SENTIMENT_MODE", "hybrid").lower()
+SENTIMENT_CONFIDENCE_THRESHOLD = float(os.getenv("SENTIMENT_CONFIDENCE_THRESHOLD", "0.6"))
+SENTIMENT_LEXICON_PATH = os.getenv("SENTIMENT_LEXICON_PATH")
 
-# ✅ Gemini endpoint
-url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={GEMINI_API_KEY}"
-
-# ✅ Headers for the request
-headers = {
-    "Content-Type": "application/json"
+# ✅ Built-in retail feedback lexicon: word -> polarity weight
+LEXICON = {
+    # Positive
+    "good": 1.0, "great": 2.0, "excellent": 2.5, "amazing": 2.5, "awesome": 2.5,
+    "fantastic": 2.5, "wonderful": 2.5, "perfect": 2.5, "love": 2.0, "loved": 2.0,
+    "like": 0.8, "liked": 1.0, "nice": 1.2, "best": 2.0, "happy": 1.5, "satisfied": 1.5,
+    "friendly": 1.5, "helpful": 1.5, "polite": 1.5, "courteous": 1.5, "fast": 1.0,
+    "quick": 1.0, "clean": 1.2, "fresh": 1.2, "tasty": 1.5, "delicious": 2.0,
+    "affordable": 1.2, "cheap": 0.5, "reasonable": 1.0, "worth": 1.2, "quality": 0.5,
+    "recommend": 1.8, "recommended": 1.8, "smooth": 1.0, "comfortable": 1.2,
+    "organized": 1.2, "efficient": 1.5, "pleasant": 1.5, "impressed": 2.0,
+    "beautiful": 1.8, "thanks": 1.0, "thank": 1.0, "superb": 2.5, "easy": 1.0,
+    "durable": 1.2, "soft": 0.8, "convenient": 1.2, "fine": 0.6, "okay": 0.3,
+    # Negative
+    "bad": -1.5, "poor": -1.8, "terrible": -2.5, "horrible": -2.5, "awful": -2.5,
+    "worst": -2.5, "hate": -2.0, "hated": -2.0, "rude": -2.0, "slow": -1.2,
+    "dirty": -1.8, "expensive": -1.2, "overpriced": -2.0, "costly": -1.0,
+    "broken": -2.0, "damaged": -2.0, "defective": -2.0, "faulty": -2.0, "stale": -1.8,
+    "late": -1.0, "delay": -1.2, "delayed": -1.2, "wait": -0.6, "waiting": -0.8,
+    "disappointed": -2.0, "disappointing": -2.0, "unhappy": -1.8, "angry": -2.0,
+    "sad": -1.2, "problem": -1.0, "issue": -0.8, "issues": -0.8, "complaint": -1.2,
+    "waste": -2.0, "useless": -2.0, "unhelpful": -1.8, "crowded": -0.8, "noisy": -0.8,
+    "smell": -0.8, "smells": -1.0, "cold": -0.5, "small": -0.3, "missing": -1.2,
+    "wrong": -1.5, "confusing": -1.2, "difficult": -1.0, "unprofessional": -2.0,
+    "rubbish": -2.0, "cheated": -2.5, "refund": -0.8, "mess": -1.5,
+    "lacking": -1.2, "worse": -2.0, "sucks": -2.0, "ignored": -1.8, "careless": -1.5,
 }
+NEGATORS = {"not", "no", "never", "none", "nobody", "nothing", "hardly", "without", "cannot"}
+INTENSIFIERS = {"very": 1.5, "really": 1.5, "extremely": 2.0, "so": 1.3, "super": 1.5, "highly": 1.5, "quite": 1.2}
+TOKEN_RE = re.compile(r"[a-z']+")
 
-def get_sentiment(feedback_text):
+if SENTIMENT_LEXICON_PATH:
+    try:
+        with open(SENTIMENT_LEXICON_PATH, encoding="utf-8") as f:
+            LEXICON.update({word.lower(): float(weight) for word, weight in json.load(f).items()})
+        print(f"✅ Loaded sentiment lexicon overrides from {SENTIMENT_LEXICON_PATH}")
+    except Exception as e:
+        print(f"❌ Could not load sentiment lexicon {SENTIMENT_LEXICON_PATH}: {e}")
+
+# ✅ Routing counters for the local/remote engines
+_stats_lock = threading.Lock()
+_stats = {"local": 0, "escalated": 0, "remote": 0}
+
+def classify_local(feedback_text):
+    """
+    Classifies feedback with the in-process lexicon. Returns (label, confidence)
+    where confidence is in [0, 1] and grows with how much polar evidence the text
+    contains and how one-sided it is. Handles simple negation ("not good"),
+    intensifiers ("very slow") and contrast ("nice but expensive").
     """
-    Uses Gemini AI to classify the sentiment of a feedback string as:
-    Positive, Negative, or Neutral.
+    tokens = TOKEN_RE.findall(feedback_text.lower())
+    positive = negative = 0.0
+    negate_window = 0
+    boost = 1.0
+    # Words after "but" usually carry the customer's real point
+    clause_weight = 1.0
+
+    for token in tokens:
+        if token in NEGATORS or token.endswith("n't"):
+            negate_window = 3
+            continue
+        if token == "but":
+            positive *= 0.5
+            negative *= 0.5
+            clause_weight = 1.5
+            continue
+        if token in INTENSIFIERS:
+            boost = INTENSIFIERS[token]
+            continue
+        # "too expensive", "too slow" — "too" makes whatever follows a complaint
+        if token == "too":
+            boost = -1.5
+            continue
+
+        weight = LEXICON.get(token)
+        if weight is not None:
+            if boost < 0:
+                weight = -abs(weight) * -boost
+            else:
+                weight *= boost
+            if negate_window:
+                weight = -weight * 0.8
+            weight *= clause_weight
+            if weight > 0:
+                positive += weight
+            else:
+                negative -= weight
+        boost = 1.0
+        negate_window = max(negate_window - 1, 0)
+
+    evidence = positive + negative
+    if evidence == 0:
+        return "Neutral", 0.0
+
+    polarity = (positive - negative) / evidence
+    confidence = abs(polarity) * (1 - math.exp(-evidence))
+    if abs(polarity) < 0.2:
+        # Mixed feedback: Neutral, but never confident enough to skip Gemini in hybrid mode
+        return "Neutral", round((1 - abs(polarity)) * (1 - math.exp(-evidence)) * 0.5, 3)
+    return ("Positive" if polarity > 0 else "Negative"), round(confidence, 3)
+
+def try_local_sentiment(feedback_text):
+    """
+    Applies SENTIMENT_MODE. Returns (label, confidence) when the local engine may
+    answer, or None when the text has to go to Gemini; records the decision.
     """
-    prompt = f"""
+    if SENTIMENT_MODE == "remote":
+        _count("remote")
+        return None
+
+    label, confidence = classify_local(feedback_text)
+    if SENTIMENT_MODE == "local" or confidence >= SENTIMENT_CONFIDENCE_THRESHOLD:
+        _count("local")
+        return label, confidence
+
+    _count("escalated")
+    return None
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+def get_sentiment_stats():
+    """Counts of texts answered locally, escalated to Gemini, or sent straight to Gemini."""
+    with _stats_lock:
+        stats = dict(_stats)
+    routed = stats["local"] + stats["escalated"]
+    stats["escalation_rate"] = round(stats["escalated"] / routed, 3) if routed else 0.0
+    stats["mode"] = SENTIMENT_MODE
+    stats["threshold"] = SENTIMENT_CONFIDENCE_THRESHOLD
+    return stats
+
+# ✅ Stored numeric priority for ordering feedback: negative first, no sentiment last
+SENTIMENT_PRIORITY = {"negative": 0, "neutral": 1, "positive": 2}
+UNKNOWN_PRIORITY = 3
+
+def sentiment_priority(sentiment):
+    return SENTIMENT_PRIORITY.get(str(sentiment or "").strip().lower(), UNKNOWN_PRIORITY)
+
+def _sentiment_prompt(feedback_text):
+    return f"""
     You are a sentiment analysis expert. Analyze the following customer feedback and respond ONLY 
     with one word: Positive, Negative, or Neutral.
     
     Feedback: "{feedback_text}"
     """
 
-    data = {
-        "contents": [
-            {
-                "parts": [{"text": prompt}]
-            }
-        ]
-    }
+def _parse_sentiment(response_data):
+    # ✅ Extract and return sentiment text
+    sentiment = extract_text(response_data)
+    return sentiment.strip() if sentiment is not None else "Unknown"
 
+def get_sentiment(feedback_text):
+    """
+    Classifies the sentiment of a feedback string as Positive, Negative, or
+    Neutral, using the local lexicon when it is confident and Gemini AI otherwise.
+    """
+    local = try_local_sentiment(feedback_text)
+    if local:
+        return local[0]
     try:
-        response = requests.post(url, json=data, headers=headers)
-        response_data = response.json()
+        return _parse_sentiment(generate_content(_sentiment_prompt(feedback_text)))
+    except Exception as e:
+        print(f"❌ Sentiment Analysis Error: {e}")
+        return "Unknown"
 
-        # ✅ Extract and return sentiment text
-        if "candidates" in response_data:
-            sentiment = response_data["candidates"][0]["content"]["parts"][0]["text"]
-            return sentiment.strip()
-        else:
-            return "Unknown"
+async def get_sentiment_async(feedback_text):
+    """Non-blocking get_sentiment for use inside async routes."""
+    local = try_local_sentiment(feedback_text)
+    if local:
+        return local[0]
+    return await get_gemini_sentiment_async(feedback_text)
 
+async def get_gemini_sentiment_async(feedback_text):
+    """Asks Gemini directly, for callers that already consulted try_local_sentiment."""
+    try:
+        return _parse_sentiment(await generate_content_async(_sentiment_prompt(feedback_text)))
     except Exception as e:
         print(f"❌ Sentiment Analysis Error: {e}")
         return "Unknown"
@@ -55,3 +200,5 @@ if __name__ == "__main__":
     feedback = "The staff is well organized"
     sentiment_result = get_sentiment(feedback)
     print("🧠 Sentiment:", sentiment_result)
+    print("⚡ Local:", classify_local(feedback))
+    print("📊 Stats:", get_sentiment_stats())
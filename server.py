@@ -1,16 +1,67 @@
-from fastapi import FastAPI, Form
+from fastapi import FastAPI, Form, Request
+from fastapi.responses import JSONResponse, Response
 import os
+import json
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from pymongo import MongoClient
 from datetime import datetime
-from twilio.rest import Client
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 from dotenv import load_dotenv
-from gemini import get_ai_suggestion
-from sentiment import get_sentiment  # ✅ Import sentiment analysis
+from gemini import get_ai_suggestion_async, get_feedback_insights_async, is_fallback_suggestion
+from sentiment import try_local_sentiment, get_gemini_sentiment_async, get_sentiment_stats, sentiment_priority, UNKNOWN_PRIORITY
+import gemini_client
+from db import MongoPool
+from indexes import ensure_indexes, backfill_priority
+from rollups import record_inserts, record_enrichments, rollups_built
+from enrichment import EnrichmentQueue
+from suggestion_cache import SuggestionCache
+from notifications import NotificationOutbox
+from catalog_cache import CatalogCache, CATALOG_CACHE_CONTROL
+from batch_ingest import build_feedback_doc, iter_ndjson, BATCH_CHUNK_SIZE, BATCH_MAX_ROWS, BATCH_ENRICH_CONCURRENCY
 
 # ✅ Load environment variables
 load_dotenv()
-app = FastAPI()
+
+# ✅ Ingest mode: "sync" enriches before responding, "async" stores the raw
+# feedback, responds immediately and enriches on the background queue
+FEEDBACK_INGEST_MODE = os.getenv("FEEDBACK_INGEST_MODE", "sync").lower()
+
+# ✅ MongoDB (Motor) pool, caches and background workers; wired up in the lifespan
+mongo = MongoPool()
+suggestion_cache = SuggestionCache()
+notification_outbox = NotificationOutbox()
+enrichment_queue = EnrichmentQueue()
+catalog_cache = CatalogCache()
+# Collections whose unique name index could not be built; their add routes check for duplicates first
+unenforced_unique = set()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    mongo.connect()
+    unenforced_unique.clear()
+    unenforced_unique.update(await ensure_indexes(mongo.feedback_db))
+    try:
+        await backfill_priority(mongo.feedbacks)
+        if not await rollups_built(mongo.feedback_rollups):
+            print("⚠️ feedback_rollups has not been backfilled; the dashboard reads raw feedbacks until `python rollups.py --rebuild` runs")
+    except PyMongoError as e:
+        print(f"❌ Startup maintenance skipped: {e}")
+    suggestion_cache.collection = mongo.suggestion_cache
+    await suggestion_cache.ensure_indexes()
+    await notification_outbox.start(mongo.notification_outbox, mongo.shopkeepers)
+    if FEEDBACK_INGEST_MODE == "async":
+        await enrichment_queue.start()
+    yield
+    await enrichment_queue.stop()
+    await notification_outbox.stop()
+    await gemini_client.aclose()
+    mongo.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # ✅ Enable CORS
 app.add_middleware(
@@ -21,47 +72,174 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ Twilio Setup
-TWILIO_SID = os.getenv("TWILIO_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_WHATSAPP_NUMBER = os.getenv("TWILIO_WHATSAPP_NUMBER")  # e.g., 'whatsapp:+14155238886'
-        
-
-client = Client(TWILIO_SID, TWILIO_AUTH_TOKEN)
-
-# ✅ MongoDB Setup
-MONGO_URI = os.getenv("MONGO_URI")
-print("Mongo URI:", MONGO_URI)  # Debugging line to check the Mongo URI
-mongo_client = MongoClient(MONGO_URI)
-feedback_db = mongo_client["FeedbackDB"]
-feedback_collection = feedback_db["feedbacks"]
-category_collection = feedback_db["feedback_categories"]
-product_collection = feedback_db["Products"]
-
-# ✅ Shopkeeper DB
-shopkeeper_db = mongo_client["ShopkeepersDB"]
-shopkeeper_collection = shopkeeper_db["shopkeepers"]
-
-# ✅ Send WhatsApp Notification
-def send_whatsapp_message(message: str):
+# ✅ Queue a WhatsApp Notification for the shopkeeper
+async def send_whatsapp_message(message: str):
     try:
-        # Fetch the latest registered shopkeeper's phone number
-        shopkeeper = shopkeeper_collection.find_one(sort=[('_id', -1)])
-        if shopkeeper and "Phone_number" in shopkeeper:
-            to_number = f"whatsapp:{shopkeeper['Phone_number']}"
-        
-        else:
-            print("❌ No shopkeeper number found.")
-            return
+        await notification_outbox.enqueue(message)
+    except Exception as e:
+        print(f"❌ WhatsApp message could not be queued: {str(e)}")
+
+# ✅ AI suggestion through the two-tier cache
+async def get_cached_suggestion(text: str, category: str, product: str):
+    suggestion = await suggestion_cache.get(text, category, product)
+    if suggestion is None:
+        suggestion = await get_ai_suggestion_async(text, category, product)
+        if not is_fallback_suggestion(suggestion):
+            await suggestion_cache.set(text, category, product, suggestion)
+    return suggestion
+
+# ✅ Sentiment + AI suggestion for a piece of feedback text. Confident local
+# sentiment only needs the suggestion prompt (or a cache hit); otherwise one
+# combined Gemini call.
+async def analyze_feedback(text: str, category: str, product: str):
+    local = try_local_sentiment(text)
+    if local:
+        sentiment, confidence = local
+        return {
+            "sentiment": sentiment,
+            "sentiment_confidence": confidence,
+            "sentiment_source": "local",
+            "priority": sentiment_priority(sentiment),
+            "suggestion": await get_cached_suggestion(text, category, product)
+        }
+
+    suggestion = await suggestion_cache.get(text, category, product)
+    if suggestion is not None:
+        sentiment = await get_gemini_sentiment_async(text)
+        return {
+            "sentiment": sentiment,
+            "sentiment_source": "gemini",
+            "priority": sentiment_priority(sentiment),
+            "suggestion": suggestion
+        }
+
+    insights = await get_feedback_insights_async(text, category, product)
+    if not is_fallback_suggestion(insights["suggestion"]):
+        await suggestion_cache.set(text, category, product, insights["suggestion"])
+    return {
+        "sentiment": insights["sentiment"],
+        "sentiment_confidence": insights["confidence"],
+        "sentiment_source": "gemini",
+        "priority": sentiment_priority(insights["sentiment"]),
+        "suggestion": insights["suggestion"]
+    }
 
-        msg = client.messages.create(
-            body=message,
-            from_=TWILIO_WHATSAPP_NUMBER,
-            to=to_number
+# ✅ Enrich an already stored feedback document, then notify the shopkeeper
+async def enrich_feedback(feedback_id, text, category, product, message):
+    enrichment = {}
+    try:
+        if text:
+            enrichment = await analyze_feedback(text, category, product)
+        # The pre-update document says which sentiment bucket the rollup counted it in
+        before = await mongo.feedbacks.find_one_and_update(
+            {"_id": feedback_id},
+            {"$set": {**enrichment, "enrichment_status": "done", "enriched_at": datetime.utcnow()}},
+            projection={"timestamp": 1, "type": 1, "product": 1, "category": 1, "sentiment": 1},
+            return_document=ReturnDocument.BEFORE
         )
-        print(f"✅ WhatsApp message sent to {to_number} with SID: {msg.sid}")
+        if before and "sentiment" in enrichment:
+            await record_enrichments(mongo.feedback_rollups, [(before, enrichment["sentiment"])])
+        print(f"✅ Feedback {feedback_id} enriched")
     except Exception as e:
-        print(f"❌ WhatsApp message failed: {str(e)}")
+        print(f"❌ Enrichment failed for {feedback_id}: {e}")
+        await mongo.feedbacks.update_one(
+            {"_id": feedback_id},
+            {"$set": {"enrichment_status": "failed", "enrichment_error": str(e)}}
+        )
+    await send_whatsapp_message(message)
+    return enrichment
+
+# ✅ Store a feedback document and enrich it inline or on the background queue.
+# Returns (inserted_id, enrichment); enrichment is None while still pending.
+async def ingest_feedback(feedback_data: dict, text, category, product, message: str):
+    # Sorts last until enrichment stores a sentiment-based priority
+    feedback_data.setdefault("priority", UNKNOWN_PRIORITY)
+    if FEEDBACK_INGEST_MODE == "async":
+        feedback_data["enrichment_status"] = "pending"
+        result = await mongo.feedbacks.insert_one(feedback_data)
+        await record_inserts(mongo.feedback_rollups, [feedback_data])
+        if enrichment_queue.submit(enrich_feedback, result.inserted_id, text, category, product, message):
+            return result.inserted_id, None
+        print("⚠️ Enrichment queue unavailable, enriching inline")
+        return result.inserted_id, await enrich_feedback(result.inserted_id, text, category, product, message)
+
+    enrichment = await analyze_feedback(text, category, product) if text else {}
+    feedback_data.update(enrichment)
+    result = await mongo.feedbacks.insert_one(feedback_data)
+    await record_inserts(mongo.feedback_rollups, [feedback_data])
+    await send_whatsapp_message(message)
+    return result.inserted_id, enrichment
+
+# ✅ Enrich a stored chunk of imported feedback with bounded concurrency and
+# write all the results back in one unordered bulk_write
+async def enrich_feedback_batch(items):
+    semaphore = asyncio.Semaphore(BATCH_ENRICH_CONCURRENCY)
+
+    async def enrich_one(text, category, product):
+        async with semaphore:
+            try:
+                return await analyze_feedback(text, category, product)
+            except Exception as e:
+                return e
+
+    enrichments = await asyncio.gather(*[enrich_one(text, category, product) for _, _, text, category, product in items])
+
+    updates = []
+    sentiment_changes = []
+    for (row_result, doc, *_), enrichment in zip(items, enrichments):
+        if isinstance(enrichment, Exception):
+            update = {"enrichment_status": "failed", "enrichment_error": str(enrichment)}
+        else:
+            update = {**enrichment, "enrichment_status": "done", "enriched_at": datetime.utcnow()}
+            row_result["sentiment"] = enrichment.get("sentiment")
+            if "sentiment" in enrichment:
+                sentiment_changes.append((doc, enrichment["sentiment"]))
+        row_result["enrichment_status"] = update["enrichment_status"]
+        updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+    try:
+        await mongo.feedbacks.bulk_write(updates, ordered=False)
+    except PyMongoError as e:
+        # The rows are stored; only their enrichment could not be saved
+        print(f"❌ Saving batch enrichment failed: {e}")
+        for row_result, *_ in items:
+            row_result.pop("sentiment", None)
+            row_result["enrichment_status"] = "failed"
+        return
+    await record_enrichments(mongo.feedback_rollups, sentiment_changes)
+
+# ✅ Insert one chunk of validated rows with insert_many(ordered=False), then enrich it
+async def store_feedback_chunk(chunk, results, enrich: bool):
+    docs = [doc for _, doc, *_ in chunk]
+    failed = {}
+    try:
+        await mongo.feedbacks.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        failed = {err["index"]: err.get("errmsg", "write error") for err in e.details.get("writeErrors", [])}
+    except PyMongoError as e:
+        # Network, server selection or write concern trouble: report this chunk and keep
+        # going, so rows stored by earlier chunks are still listed in the response
+        print(f"❌ Feedback batch chunk failed: {e}")
+        failed = {position: f"chunk write failed: {e}" for position in range(len(chunk))}
+
+    to_enrich = []
+    stored = []
+    for position, (row_number, doc, text, category, product) in enumerate(chunk):
+        if position in failed:
+            results.append({"row": row_number, "status": "failed", "error": failed[position]})
+            continue
+        stored.append(doc)
+        row_result = {"row": row_number, "status": "stored", "feedback_id": str(doc["_id"])}
+        results.append(row_result)
+        if text and enrich:
+            to_enrich.append((row_result, doc, text, category, product))
+
+    await record_inserts(mongo.feedback_rollups, stored)
+    if to_enrich:
+        await enrich_feedback_batch(to_enrich)
+
+async def _iter_rows(rows):
+    for row_number, row in enumerate(rows, start=1):
+        yield row_number, row
 
 # ✅ Route: AI Suggestion Only
 @app.post("/get_ai_suggestion")
@@ -70,7 +248,7 @@ async def get_ai_response(
     category: str = Form(...),
     product: str = Form(...)
 ):
-    ai_suggestion = get_ai_suggestion(feedback, category, product)
+    ai_suggestion = await get_cached_suggestion(feedback, category, product)
     return {"suggestion": ai_suggestion}
 
 # ✅ Route: Submit Text Feedback
@@ -80,31 +258,34 @@ async def submit_text_feedback(
     category: str = Form(...),
     product: str = Form(...)
 ):
-    ai_suggestion = get_ai_suggestion(feedback, category, product)
-    sentiment = get_sentiment(feedback)
-
     feedback_data = {
         "type": "text",
         "category": category,
         "product": product,
         "content": feedback,
-        "sentiment": sentiment,
-        "suggestion": ai_suggestion,
         "timestamp": datetime.utcnow()
     }
 
-    result = feedback_collection.insert_one(feedback_data)
-    print(f"✅ Text feedback stored with ID: {result.inserted_id}")
-
     message = f"📝 New feedback:\nType: Text\nCategory: {category}\nProduct: {product}\nFeedback: {feedback}"
-    send_whatsapp_message(message)
+    feedback_id, enrichment = await ingest_feedback(feedback_data, feedback, category, product, message)
+    print(f"✅ Text feedback stored with ID: {feedback_id}")
+
+    if enrichment is None:
+        return {
+            "message": "Text feedback received",
+            "feedback_id": str(feedback_id),
+            "enrichment_status": "pending",
+            "category": category,
+            "product": product
+        }
 
     return {
         "message": "Text feedback saved successfully",
+        "feedback_id": str(feedback_id),
         "category": category,
         "product": product,
-        "ai_suggestion": ai_suggestion,
-        "sentiment": sentiment
+        "ai_suggestion": enrichment.get("suggestion"),
+        "sentiment": enrichment.get("sentiment")
     }
 
 # ✅ Route: Submit Voice Feedback
@@ -114,31 +295,34 @@ async def submit_voice_feedback(
     category: str = Form(...),
     product: str = Form(...)
 ):
-    ai_suggestion = get_ai_suggestion(text, category, product)
-    sentiment = get_sentiment(text)
-
     feedback_data = {
         "type": "voice",
         "category": category,
         "product": product,
         "content": text,
-        "sentiment": sentiment,
-        "suggestion": ai_suggestion,
         "timestamp": datetime.utcnow()
     }
 
-    result = feedback_collection.insert_one(feedback_data)
-    print(f"✅ Voice feedback stored with ID: {result.inserted_id}")
-
     message = f"🎤 New voice feedback:\nCategory: {category}\nProduct: {product}\nFeedback: {text}"
-    send_whatsapp_message(message)
+    feedback_id, enrichment = await ingest_feedback(feedback_data, text, category, product, message)
+    print(f"✅ Voice feedback stored with ID: {feedback_id}")
+
+    if enrichment is None:
+        return {
+            "message": "Voice feedback received",
+            "feedback_id": str(feedback_id),
+            "enrichment_status": "pending",
+            "category": category,
+            "product": product
+        }
 
     return {
         "message": "Voice feedback saved successfully",
+        "feedback_id": str(feedback_id),
         "category": category,
         "product": product,
-        "ai_suggestion": ai_suggestion,
-        "sentiment": sentiment
+        "ai_suggestion": enrichment.get("suggestion"),
+        "sentiment": enrichment.get("sentiment")
     }
 
 # ✅ Route: Submit Emotion Feedback
@@ -164,20 +348,12 @@ async def submit_emotion_feedback(
     if product:
         feedback_data["product"] = product
 
-    # If negative emotion and reason is provided
+    # If negative emotion and reason is provided, it gets sentiment + suggestion
+    reason = None
     if emotion.lower() in ["angry", "sad"]:
         reason = reason_text or reason_voice
         if reason:
             feedback_data["content"] = reason
-            feedback_data["sentiment"] = get_sentiment(reason)
-            feedback_data["suggestion"] = get_ai_suggestion(reason, category or "General", product or "General")
-
-    # ✅ Always store the emotion feedback
-    result = feedback_collection.insert_one(feedback_data)
-    print(f"✅ Emotion feedback stored with ID: {result.inserted_id}")
-    print("📄 Stored Document:", feedback_data)
-
-    
 
     # 📲 Construct WhatsApp message for all emotion feedback
     message = f"😊 New emotion feedback:\nEmotion: {emotion}\nRating: {rating}"
@@ -186,69 +362,220 @@ async def submit_emotion_feedback(
         message += f"\nCategory: {category}"
     if product:
         message += f"\nProduct: {product}"
-    if "content" in feedback_data:
-        message += f"\nReason: {feedback_data['content']}"
+    if reason:
+        message += f"\nReason: {reason}"
 
-    send_whatsapp_message(message)
+    # ✅ Always store the emotion feedback
+    feedback_id, enrichment = await ingest_feedback(
+        feedback_data, reason, category or "General", product or "General", message
+    )
+    print(f"✅ Emotion feedback stored with ID: {feedback_id}")
+    print("📄 Stored Document:", feedback_data)
 
+    if enrichment is None:
+        return {
+            "message": "Emotion feedback received",
+            "feedback_id": str(feedback_id),
+            "enrichment_status": "pending",
+            "emotion": emotion,
+            "rating": rating,
+            "stored": True
+        }
 
     return {
         "message": "Emotion feedback saved successfully",
+        "feedback_id": str(feedback_id),
         "emotion": emotion,
         "rating": rating,
         "stored": True,
-        "ai_suggestion": feedback_data.get("suggestion"),
-        "sentiment": feedback_data.get("sentiment")
+        "ai_suggestion": enrichment.get("suggestion"),
+        "sentiment": enrichment.get("sentiment")
+    }
+
+# ✅ Route: Bulk import of offline feedback (JSON array or streamed NDJSON)
+@app.post("/submit_feedback_batch")
+async def submit_feedback_batch(request: Request, enrich: bool = True):
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        # Rows are parsed and stored chunk by chunk while the body is still arriving
+        rows = iter_ndjson(request.stream())
+    else:
+        try:
+            body = json.loads(await request.body())
+        except ValueError:
+            return {"error": "Body must be a JSON array or NDJSON"}
+        if not isinstance(body, list):
+            return {"error": "Body must be a JSON array or NDJSON"}
+        rows = _iter_rows(body)
+
+    results = []
+    chunk = []
+    received = 0
+    truncated = False
+    async for row_number, row in rows:
+        if received >= BATCH_MAX_ROWS:
+            truncated = True
+            break
+        received += 1
+        try:
+            if isinstance(row, Exception):
+                raise row
+            doc, text, category, product = build_feedback_doc(row)
+        except ValueError as e:
+            results.append({"row": row_number, "status": "invalid", "error": str(e)})
+            continue
+        if text and enrich:
+            doc["enrichment_status"] = "pending"
+        chunk.append((row_number, doc, text, category, product))
+        if len(chunk) >= BATCH_CHUNK_SIZE:
+            await store_feedback_chunk(chunk, results, enrich)
+            chunk = []
+    if chunk:
+        await store_feedback_chunk(chunk, results, enrich)
+
+    results.sort(key=lambda r: r["row"])
+    counts = {status: sum(1 for r in results if r["status"] == status) for status in ("stored", "invalid", "failed")}
+    print(f"✅ Feedback batch imported: {counts}")
+
+    # One summary notification for the whole import instead of one per row
+    if counts["stored"]:
+        await send_whatsapp_message(f"📦 Imported {counts['stored']} offline feedbacks")
+
+    return {
+        "message": "Feedback batch processed",
+        "received": received,
+        **counts,
+        "truncated": truncated,
+        "results": results
+    }
+
+# ✅ Route: Poll enrichment result for a stored feedback
+@app.get("/feedback_status/{feedback_id}")
+async def feedback_status(feedback_id: str):
+    try:
+        oid = ObjectId(feedback_id)
+    except (InvalidId, TypeError):
+        return {"error": "Invalid feedback id"}
+
+    doc = await mongo.feedbacks.find_one(
+        {"_id": oid},
+        {"_id": 0, "enrichment_status": 1, "sentiment": 1, "suggestion": 1, "enrichment_error": 1}
+    )
+    if not doc:
+        return {"error": "Feedback not found"}
+
+    return {
+        "feedback_id": feedback_id,
+        # Documents stored in sync mode were enriched before insertion
+        "enrichment_status": doc.get("enrichment_status", "done"),
+        "sentiment": doc.get("sentiment"),
+        "ai_suggestion": doc.get("suggestion"),
+        "error": doc.get("enrichment_error")
     }
 
+# ✅ Route: Background enrichment queue stats
+@app.get("/enrichment_stats")
+async def enrichment_stats():
+    return {"mode": FEEDBACK_INGEST_MODE, **enrichment_queue.stats()}
+
+# ✅ Route: Suggestion cache hit/miss metrics
+@app.get("/admin/suggestion_cache_stats")
+async def suggestion_cache_stats():
+    return suggestion_cache.stats()
+
+# ✅ Route: Drop cached suggestions for a product (e.g. after it was reformulated)
+@app.post("/admin/invalidate_suggestion_cache")
+async def invalidate_suggestion_cache(product: str = Form(...)):
+    removed = await suggestion_cache.invalidate_product(product)
+    return {"message": f"Removed {removed} cached suggestions for '{product}'", "removed": removed}
+
+# ✅ Route: Notification outbox counters
+@app.get("/notification_stats")
+async def notification_stats():
+    return await notification_outbox.stats()
+
+# ✅ Route: Local vs Gemini sentiment routing counters
+@app.get("/sentiment_stats")
+async def sentiment_stats():
+    return get_sentiment_stats()
+
+# ✅ Serve a cached catalog payload, or 304 if the client already has this version
+def catalog_response(request: Request, payload, etag: str):
+    headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    client_tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if etag in client_tags or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
+# ✅ Route: Categories and products in one round-trip
+@app.get("/catalog")
+async def get_catalog(request: Request):
+    snapshot = await catalog_cache.get(mongo.categories, mongo.products)
+    return catalog_response(request, *snapshot["catalog"])
+
+# ✅ Route: Catalog cache counters
+@app.get("/catalog_stats")
+async def catalog_stats():
+    return catalog_cache.stats()
+
 # ✅ Route: Get All Categories
 @app.get("/get_categories")
-async def get_categories():
-    categories = list(category_collection.find({}, {"_id": 0, "name": 1}))
-    return {"categories": [cat["name"] for cat in categories]}
+async def get_categories(request: Request):
+    snapshot = await catalog_cache.get(mongo.categories, mongo.products)
+    return catalog_response(request, *snapshot["categories"])
 
 # ✅ Route: Add Category
 @app.post("/add_category")
 async def add_category(name: str = Form(...)):
     if not name.strip():
         return {"error": "Category name cannot be empty"}
-    exists = category_collection.find_one({"name": name})
-    if exists:
+    # The unique index on name rejects duplicates atomically, even for concurrent admins
+    if "feedback_categories" in unenforced_unique and await mongo.categories.find_one({"name": name}):
         return {"error": "Category already exists"}
-    category_collection.insert_one({"name": name})
+    try:
+        await mongo.categories.insert_one({"name": name})
+    except DuplicateKeyError:
+        return {"error": "Category already exists"}
+    catalog_cache.invalidate()
     return {"message": f"Category '{name}' added"}
 
 # ✅ Route: Delete Category
 @app.post("/delete_category")
 async def delete_category(name: str = Form(...)):
-    result = category_collection.delete_one({"name": name})
+    result = await mongo.categories.delete_one({"name": name})
     if result.deleted_count == 0:
         return {"error": "Category not found"}
+    catalog_cache.invalidate()
     return {"message": f"Category '{name}' deleted"}
 
 # ✅ Route: Get All Products
 @app.get("/get_products")
-async def get_products():
-    products = list(product_collection.find({}, {"_id": 0, "name": 1, "price": 1}))
-    return {"products": products}
+async def get_products(request: Request):
+    snapshot = await catalog_cache.get(mongo.categories, mongo.products)
+    return catalog_response(request, *snapshot["products"])
 
 # ✅ Route: Add Product
 @app.post("/add_product")
 async def add_product(name: str = Form(...)):
     if not name.strip():
         return {"error": "Product name cannot be empty"}
-    exists = product_collection.find_one({"name": name})
-    if exists:
+    if "Products" in unenforced_unique and await mongo.products.find_one({"name": name}):
+        return {"error": "Product already exists"}
+    try:
+        await mongo.products.insert_one({"name": name})
+    except DuplicateKeyError:
         return {"error": "Product already exists"}
-    product_collection.insert_one({"name": name})
+    catalog_cache.invalidate()
     return {"message": f"Product '{name}' added"}
 
 # ✅ Route: Delete Product
 @app.post("/delete_product")
 async def delete_product(name: str = Form(...)):
-    result = product_collection.delete_one({"name": name})
+    result = await mongo.products.delete_one({"name": name})
     if result.deleted_count == 0:
         return {"error": "Product not found"}
+    catalog_cache.invalidate()
     return {"message": f"Product '{name}' deleted"}
 
 # ✅ Run server
@@ -27,8 +27,7 @@ const EmotionFeedback = () => {
 
   useEffect(() => {
     startWebcam();
-    fetchCategories();
-    fetchProducts();
+    fetchCatalog();
   }, []);
 
   const startWebcam = () => {
@@ -55,49 +54,61 @@ const EmotionFeedback = () => {
     }, 1000);
   };
 
-  const captureImage = () => {
+  // A short burst instead of one frame, so a blink or motion blur doesn't decide the emotion
+  const BURST_FRAMES = 5;
+  const BURST_INTERVAL_MS = 150;
+
+  const grabFrame = (canvas, video) =>
+    new Promise((resolve) => {
+      canvas.getContext("2d").drawImage(video, 0, 0, canvas.width, canvas.height);
+      canvas.toBlob(resolve, "image/jpeg");
+    });
+
+  const captureImage = async () => {
     const canvas = canvasRef.current;
     const video = videoRef.current;
-    const ctx = canvas.getContext("2d");
     canvas.width = video.videoWidth;
     canvas.height = video.videoHeight;
-    ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-
-    const imageURL = canvas.toDataURL("image/jpeg");
-    setCapturedImage(imageURL);
-    setCaptured(true);
     setCountdown(null);
 
+    const frames = [];
+    for (let i = 0; i < BURST_FRAMES; i++) {
+      if (i > 0) await new Promise((resolve) => setTimeout(resolve, BURST_INTERVAL_MS));
+      frames.push(await grabFrame(canvas, video));
+      if (i === 0) {
+        setCapturedImage(canvas.toDataURL("image/jpeg"));
+        setCaptured(true);
+      }
+    }
+
     if (videoRef.current?.srcObject) {
       videoRef.current.srcObject.getTracks().forEach((track) => track.stop());
       videoRef.current.srcObject = null;
     }
 
-    sendToBackend(canvas);
+    sendToBackend(frames);
   };
 
-  const sendToBackend = (canvas) => {
-    canvas.toBlob(async (blob) => {
-      const formData = new FormData();
-      formData.append("image", blob, "captured.jpg");
-
-      try {
-        const res = await axios.post(`${backendUrl}/detect_emotion`, formData);
-        const detectedEmotion = res.data.emotion;
-        setEmotion(detectedEmotion);
+  const sendToBackend = async (frames) => {
+    const formData = new FormData();
+    frames.forEach((blob, i) => formData.append("frames", blob, `frame${i}.jpg`));
 
-        const isNegative = detectedEmotion === "angry" || detectedEmotion === "sad";
+    try {
+      const res = await axios.post(`${backendUrl}/detect_emotion_burst`, formData);
+      const detectedEmotion = res.data.emotion;
+      setEmotion(detectedEmotion);
 
-        if (!isNegative) {
-          await sendEmotionFeedbackToDB(detectedEmotion); // submit immediately for non-negatives
-          setTimeout(() => navigate("/"), 2000);
-        }
+      const isNegative = detectedEmotion === "angry" || detectedEmotion === "sad";
 
-      } catch (err) {
-        console.error("Detection error:", err);
-        setEmotion("Error detecting emotion");
+      if (!isNegative) {
+        await sendEmotionFeedbackToDB(detectedEmotion); // submit immediately for non-negatives
+        setTimeout(() => navigate("/"), 2000);
       }
-    }, "image/jpeg");
+
+    } catch (err) {
+      console.error("Detection error:", err);
+      setEmotion("Error detecting emotion");
+    }
   };
 
   const getStarRating = (emotion) => {
@@ -105,21 +116,14 @@ const EmotionFeedback = () => {
     return ratings[emotion] || 0;
   };
 
-  const fetchCategories = async () => {
+  // Categories and products come from one cached /catalog call
+  const fetchCatalog = async () => {
     try {
-      const res = await axios.get(`https://server-backend-nry1.onrender.com/get_categories`);
+      const res = await axios.get(`https://server-backend-nry1.onrender.com/catalog`);
       setCategories(res.data.categories || []);
-    } catch (err) {
-      console.error("Category fetch error:", err);
-    }
-  };
-
-  const fetchProducts = async () => {
-    try {
-      const res = await axios.get(`https://server-backend-nry1.onrender.com/get_products`);
       setProducts(res.data.products || []);
     } catch (err) {
-      console.error("Product fetch error:", err);
+      console.error("Catalog fetch error:", err);
     }
   };
 
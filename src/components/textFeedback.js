@@ -14,28 +14,19 @@ const TextFeedback = () => {
   const navigate = useNavigate();
 
   useEffect(() => {
-    const fetchCategories = async () => {
+    // Categories and products come from one cached /catalog call
+    const fetchCatalog = async () => {
       try {
-        const res = await fetch("https://server-backend-nry1.onrender.com/get_categories");
+        const res = await fetch("https://server-backend-nry1.onrender.com/catalog");
         const data = await res.json();
         setCategories(data.categories || []);
-      } catch (err) {
-        console.error("Error fetching categories:", err);
-      }
-    };
-
-    const fetchProducts = async () => {
-      try {
-        const res = await fetch("https://server-backend-nry1.onrender.com/get_products");
-        const data = await res.json();
         setProducts(data.products || []);
       } catch (err) {
-        console.error("Error fetching products:", err);
+        console.error("Error fetching catalog:", err);
       }
     };
 
-    fetchCategories();
-    fetchProducts();
+    fetchCatalog();
   }, []);
 
   const handleSubmit = async () => {
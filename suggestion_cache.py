@@ -0,0 +1,139 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from dotenv import load_dotenv
+
+# ✅ Load cache settings from the .env file
+load_dotenv()
+SUGGESTION_CACHE_SIZE = int(os.getenv("SUGGESTION_CACHE_SIZE", "1000"))
+SUGGESTION_CACHE_TTL = int(os.getenv("SUGGESTION_CACHE_TTL", str(7 * 24 * 3600)))
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_feedback(text):
+    """Lowercases, drops punctuation and collapses whitespace so near-identical feedback matches."""
+    text = _PUNCTUATION_RE.sub(" ", (text or "").lower())
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def cache_key(feedback_text, category, product):
+    raw = "|".join([normalize_feedback(feedback_text), normalize_feedback(category), normalize_feedback(product)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SuggestionCache:
+    """
+    Two-tier cache for AI suggestions: an in-process LRU in front of a Mongo
+    collection whose TTL index expires old answers. The collection is an async
+    (Motor) collection; Mongo errors are logged and the cache keeps working from
+    memory.
+    """
+
+    def __init__(self, collection=None, max_entries=SUGGESTION_CACHE_SIZE, ttl_seconds=SUGGESTION_CACHE_TTL):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, product, suggestion)
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "stores": 0, "invalidated": 0}
+
+    async def ensure_indexes(self):
+        if self.collection is None:
+            return
+        try:
+            await self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+            await self.collection.create_index("product")
+        except Exception as e:
+            print(f"❌ Suggestion cache index error: {e}")
+
+    async def get(self, feedback_text, category, product):
+        key = cache_key(feedback_text, category, product)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[2]
+            if entry:
+                del self._entries[key]
+
+        doc = None
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one({"_id": key}, {"suggestion": 1, "created_at": 1})
+            except Exception as e:
+                print(f"❌ Suggestion cache lookup error: {e}")
+
+        if doc:
+            # Mongo's TTL monitor only runs about once a minute, so check the age here too
+            age = (datetime.utcnow() - doc["created_at"]).total_seconds()
+            if age < self.ttl_seconds:
+                self._remember(key, product, doc["suggestion"], now + self.ttl_seconds - age)
+                with self._lock:
+                    self._stats["mongo_hits"] += 1
+                return doc["suggestion"]
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    async def set(self, feedback_text, category, product, suggestion):
+        key = cache_key(feedback_text, category, product)
+        self._remember(key, product, suggestion, time.time() + self.ttl_seconds)
+        with self._lock:
+            self._stats["stores"] += 1
+
+        if self.collection is not None:
+            try:
+                await self.collection.replace_one(
+                    {"_id": key},
+                    {"product": normalize_feedback(product), "category": category, "suggestion": suggestion, "created_at": datetime.utcnow()},
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"❌ Suggestion cache store error: {e}")
+
+    async def invalidate_product(self, product):
+        """Drops every cached suggestion for a product from both tiers. Returns the number removed."""
+        normalized = normalize_feedback(product)
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry[1] == normalized]
+            for key in keys:
+                del self._entries[key]
+        removed = len(keys)
+
+        if self.collection is not None:
+            try:
+                # Documents stored before products were normalized hold the raw name
+                result = await self.collection.delete_many({"product": {"$in": list({normalized, product})}})
+                removed = max(removed, result.deleted_count)
+            except Exception as e:
+                print(f"❌ Suggestion cache invalidation error: {e}")
+
+        with self._lock:
+            self._stats["invalidated"] += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._entries)
+        lookups = stats["memory_hits"] + stats["mongo_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["mongo_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _remember(self, key, product, suggestion, expires_at):
+        with self._lock:
+            # Stored normalized, like the cache key, so invalidate_product("Milk ") finds "milk"
+            self._entries[key] = (expires_at, normalize_feedback(product), suggestion)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)